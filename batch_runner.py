@@ -0,0 +1,285 @@
+"""
+Headless sweep: fetch -> walk-forward -> stack -> stats for a list of tickers.
+
+    python batch_runner.py tickers.txt --start 2018-01-01 --workers 8 --out results/
+
+The tickers file has one symbol per line (blank lines and '#' comments are
+ignored). Each finished ticker is written to <out>/tickers/<TICKER>.json as
+soon as it completes; that file is the checkpoint, so re-running the same
+command resumes where an interrupted sweep stopped. Checkpoints carry a hash
+of the settings that affect results, and a sweep refuses to resume into a
+directory written with different settings (pass a fixed --end for nightly
+re-runs, or --overwrite to start the directory over). At the end the runner
+writes <out>/summary.csv and <out>/history.json (same layout as the app's
+history file), which the dashboard can load instead of recomputing.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from config import strategy_params
+
+STACK_MODES = ["none", "or", "correlation"]
+# Settings that change a ticker's result; a checkpoint is only reused when these match
+RESULT_KEYS = ["start", "end", "strategies", "stack_mode", "corr_threshold", "corr_metric", "store"]
+
+
+def read_tickers(path):
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            ticker = line.split("#", 1)[0].strip().upper()
+            if ticker:
+                tickers.append(ticker)
+    return list(dict.fromkeys(tickers))
+
+
+def _jsonable(value):
+    """Stats values include Timestamps, Timedeltas and NaN; keep numbers numeric."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if math.isfinite(value) else None
+    if hasattr(value, "item"):
+        return _jsonable(value.item())
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(value)
+
+
+def run_ticker(ticker, cfg):
+    """Full pipeline for one ticker; returns a JSON-serializable result dict."""
+    from core import walk_forward_optimize, build_portfolio
+    from data import get_price_data
+
+    t0 = time.perf_counter()
+    result = {"ticker": ticker, "status": "ok"}
+
+    if cfg.get("store"):
+        # Zero-copy view over the memory-mapped store instead of a network fetch
+        from price_store import PriceStore
+        store = PriceStore(cfg["store"])
+        if ticker in store.tickers:
+            price = store.series(ticker).loc[cfg["start"]:cfg["end"]]
+        else:
+            price = pd.Series(dtype=float)
+    else:
+        price = get_price_data(ticker, start=cfg["start"], end=cfg["end"])
+    result["rows"] = len(price)
+    if price.empty:
+        result["status"] = "no_data"
+        return result
+
+    best_strats = {}
+    strat_scores = {}
+    for strat in cfg["strategies"]:
+        best_params, best_score = walk_forward_optimize(price, strat)
+        if best_params:
+            best_strats[strat] = best_params
+            strat_scores[strat] = best_score
+    result["best_params"] = best_strats
+    result["scores"] = {k: _jsonable(v) for k, v in strat_scores.items()}
+
+    pf, chosen = build_portfolio(price, best_strats, strat_scores, cfg["stack_mode"],
+                                 cfg["corr_threshold"], cfg["corr_metric"])
+    result["chosen"] = chosen
+    if pf is None:
+        result["status"] = "no_portfolio"
+        return result
+
+    result["stats"] = {k: _jsonable(v) for k, v in pf.stats().items()}
+    if cfg.get("bundle"):
+        # Columnar rows go back to the parent, which owns the bundle writers
+        from core import stacked_signals
+        from export import ticker_frames
+        entries, exits = stacked_signals(price, {s: best_strats[s] for s in chosen})
+        result["_frames"] = ticker_frames(ticker, pf, entries, exits, best_strats, strat_scores, chosen)
+    if cfg["trades"]:
+        trades_path = Path(cfg["out"]) / "tickers" / f"{ticker}_trades.csv"
+        pf.trades.records_readable.to_csv(trades_path, index=False)
+
+    result["seconds"] = round(time.perf_counter() - t0, 3)
+    return result
+
+
+def config_id(cfg):
+    """Short hash of the result-affecting settings in cfg."""
+    key = json.dumps({k: cfg.get(k) for k in RESULT_KEYS}, sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def _safe_run(ticker, cfg):
+    try:
+        return run_ticker(ticker, cfg)
+    except Exception as e:
+        return {"ticker": ticker, "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def _write_json(path, payload):
+    # Write-then-rename so a killed sweep never leaves a half-written checkpoint
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_results(out_dir):
+    """{ticker: result dict} for every checkpoint in a sweep directory."""
+    results = {}
+    for path in sorted((Path(out_dir) / "tickers").glob("*.json")):
+        with open(path) as f:
+            result = json.load(f)
+        results[result["ticker"]] = result
+    return results
+
+
+def summarize(results):
+    """One row per ticker, same columns as the app's summary table."""
+    rows = []
+    for ticker, r in results.items():
+        stats = r.get("stats") or {}
+        rows.append({
+            "Ticker": ticker,
+            "Status": r.get("status"),
+            "Chosen_Strategies": ", ".join(r.get("chosen") or []),
+            "Total_Return": stats.get("Total Return [%]"),
+            "Sharpe_Ratio": stats.get("Sharpe Ratio"),
+            "Max_Drawdown": stats.get("Max Drawdown [%]"),
+            "Seconds": r.get("seconds"),
+        })
+    return pd.DataFrame(rows)
+
+
+def _check_resume(out, cfg, overwrite):
+    """
+    Refuse to mix checkpoints from a different config into this sweep.
+    With overwrite, the old checkpoints, trade CSVs and bundle are removed.
+    """
+    run_path = out / "run.json"
+    if not run_path.exists():
+        return
+    with open(run_path) as f:
+        previous = json.load(f)
+    if previous.get("config_id") == cfg["config_id"]:
+        return
+    if not overwrite:
+        changed = [k for k in RESULT_KEYS if previous.get(k) != cfg.get(k)]
+        raise ValueError(
+            f"{out} holds a sweep with different settings ({', '.join(changed) or 'config_id'}); "
+            f"use a new --out, or --overwrite to discard its results")
+    import shutil
+    for path in (out / "tickers").glob("*"):
+        path.unlink()
+    shutil.rmtree(out / "bundle", ignore_errors=True)
+
+
+def sweep(tickers, cfg, workers=4, retry_failed=False, overwrite=False):
+    out = Path(cfg["out"])
+    cfg = dict(cfg, config_id=config_id(cfg))
+    (out / "tickers").mkdir(parents=True, exist_ok=True)
+    _check_resume(out, cfg, overwrite)
+    _write_json(out / "run.json", cfg)
+
+    # Only checkpoints written under this config count as done
+    done = {t: r for t, r in load_results(out).items() if r.get("config_id") == cfg["config_id"]}
+    if cfg.get("bundle"):
+        # A run killed before its bundle part was closed checkpointed tickers
+        # that never reached the bundle; run those again
+        from export import exported_tickers
+        exported = exported_tickers(out / "bundle")
+        done = {t: r for t, r in done.items() if r["status"] != "ok" or t in exported}
+    todo = [t for t in tickers
+            if t not in done or (retry_failed and done[t]["status"] != "ok")]
+    print(f"[INFO] {len(tickers)} tickers, {len(tickers) - len(todo)} already done, "
+          f"{len(todo)} to run with {workers} workers")
+
+    bundle = None
+    if cfg.get("bundle") and todo:
+        from export import RunExporter
+        bundle = RunExporter(out / "bundle")
+
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = {pool.submit(_safe_run, t, cfg): t for t in todo}
+            for i, job in enumerate(as_completed(jobs), 1):
+                result = job.result()
+                result["config_id"] = cfg["config_id"]
+                frames = result.pop("_frames", None)
+                if bundle is not None and frames:
+                    bundle.write(frames)
+                _write_json(out / "tickers" / f"{result['ticker']}.json", result)
+                done[result["ticker"]] = result
+                rate = i / (time.perf_counter() - t0)
+                print(f"[{i}/{len(todo)}] {result['ticker']}: {result['status']} "
+                      f"({rate:.2f} tickers/s)")
+    finally:
+        # Closing writes the Parquet footers, so an interrupted sweep still
+        # leaves a readable bundle part for the tickers that finished
+        if bundle is not None:
+            bundle.close()
+
+    results = {t: done[t] for t in tickers if t in done}
+    summarize(results).to_csv(out / "summary.csv", index=False)
+    history = {t: r["scores"] for t, r in results.items() if r.get("scores")}
+    _write_json(out / "history.json", history)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tickers_file")
+    parser.add_argument("--start", default="2018-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--strategies", default="MA,RSI,MACD",
+                        help=f"comma-separated, any of: {', '.join(strategy_params)}")
+    parser.add_argument("--stack-mode", choices=STACK_MODES, default="correlation")
+    parser.add_argument("--corr-threshold", type=float, default=0.3)
+    parser.add_argument("--corr-metric", choices=["returns", "signals"], default="returns")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", default="results")
+    parser.add_argument("--store", default=None,
+                        help="read prices from a price_store directory instead of fetching")
+    parser.add_argument("--bundle", action="store_true",
+                        help="stream trades/equity/signals/params/stats to <out>/bundle (Parquet)")
+    parser.add_argument("--trades", action="store_true", help="also write per-ticker trade CSVs")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-run tickers whose checkpoint is not 'ok'")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="discard results in --out written with different settings")
+    args = parser.parse_args(argv)
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in strategy_params]
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+
+    cfg = {
+        "start": args.start,
+        "end": args.end or pd.Timestamp.today().strftime("%Y-%m-%d"),
+        "strategies": strategies,
+        "stack_mode": args.stack_mode,
+        "corr_threshold": args.corr_threshold,
+        "corr_metric": args.corr_metric,
+        "out": args.out,
+        "trades": args.trades,
+        "store": args.store,
+        "bundle": args.bundle,
+    }
+    try:
+        results = sweep(read_tickers(args.tickers_file), cfg, args.workers, args.retry_failed, args.overwrite)
+    except ValueError as e:
+        parser.error(str(e))
+    ok = sum(r["status"] == "ok" for r in results.values())
+    print(f"[INFO] {ok}/{len(results)} tickers ok; results in {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""
+Offline benchmarks for the strategy, backtest and level-finding hot paths.
+
+All inputs come from the seeded generator in benchmarks.synthetic, so runs
+need no network and are comparable across machines and commits.
+
+    python -m benchmarks.run run --out bench_results.json
+    python -m benchmarks.run run --sizes 1k,10k --tickers 1,10 --filter walk_forward
+    python -m benchmarks.run compare bench_results.json baseline.json --tolerance 0.15
+
+Each case is timed once cold (includes numba compilation), then `repeat`
+times warm; peak memory is taken from a separate tracemalloc pass. Cases
+that would take far too long at a size (see max_bars) are recorded as
+skipped unless --all is given. A case that raises is recorded with an
+"error" field and the run carries on; compare reports it as a regression.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from config import strategy_params
+from benchmarks.synthetic import make_ohlcv, make_price, make_universe
+
+DEFAULT_SIZES = "1k,10k,1M"
+DEFAULT_TICKERS = "1,10,100,500"
+# Bars per ticker in the universe cases: enough for one default
+# walk-forward window (756 train + 126 test)
+UNIVERSE_BARS = 1260
+
+BAR_CASES = []
+TICKER_CASES = []
+
+
+def bar_case(name, max_bars=None):
+    """Register fn(bars) -> thunk, benchmarked at every bar count."""
+    def register(fn):
+        BAR_CASES.append((name, fn, max_bars))
+        return fn
+    return register
+
+
+def ticker_case(name, max_tickers=None):
+    """Register fn(n_tickers) -> thunk, benchmarked at every ticker count."""
+    def register(fn):
+        TICKER_CASES.append((name, fn, max_tickers))
+        return fn
+    return register
+
+
+def _first_params(strat):
+    return {k: v[0] for k, v in strategy_params[strat].items()}
+
+
+# === Cases ===
+def _register_build_signals(strat):
+    @bar_case(f"build_signals[{strat}]")
+    def _case(bars):
+        from strategies import build_signals
+        price = make_price(bars)
+        params = _first_params(strat)
+        return lambda: build_signals(price, strat, params)
+
+
+for _strat in strategy_params:
+    _register_build_signals(_strat)
+
+
+@bar_case("run_backtest[MA]")
+def _run_backtest(bars):
+    from core import run_backtest
+    price = make_price(bars)
+    params = _first_params("MA")
+    return lambda: run_backtest(price, "MA", params)
+
+
+@bar_case("walk_forward_optimize[MA]", max_bars=100_000)
+def _walk_forward(bars):
+    from core import walk_forward_optimize
+    price = make_price(bars)
+    return lambda: walk_forward_optimize(price, "MA")
+
+
+@bar_case("stack_by_correlation[all]")
+def _stack_by_correlation(bars):
+    from core import stack_by_correlation
+    price = make_price(bars)
+    best = {strat: _first_params(strat) for strat in strategy_params}
+    return lambda: stack_by_correlation(price, best)
+
+
+@bar_case("SupportResistanceFinder.find_swing_points")
+def _swing_points(bars):
+    from support_resistance import SupportResistanceFinder
+    finder = SupportResistanceFinder(make_ohlcv(bars))
+    return lambda: finder.find_swing_points()
+
+
+@bar_case("SupportResistanceFinder.get_all_levels", max_bars=10_000)
+def _all_levels(bars):
+    from support_resistance import SupportResistanceFinder
+    finder = SupportResistanceFinder(make_ohlcv(bars))
+    return lambda: finder.get_all_levels()
+
+
+@ticker_case("universe.build_signals[MA]")
+def _universe_signals(n_tickers):
+    from strategies import build_signals
+    universe = make_universe(n_tickers, UNIVERSE_BARS)
+    params = _first_params("MA")
+    return lambda: [build_signals(p, "MA", params) for p in universe.values()]
+
+
+@ticker_case("universe.walk_forward_optimize[MA]")
+def _universe_walk_forward(n_tickers):
+    from core import walk_forward_optimize
+    universe = make_universe(n_tickers, UNIVERSE_BARS)
+    return lambda: [walk_forward_optimize(p, "MA") for p in universe.values()]
+
+
+@ticker_case("universe.stack_by_correlation[all]", max_tickers=100)
+def _universe_stack(n_tickers):
+    from core import stack_by_correlation
+    universe = make_universe(n_tickers, UNIVERSE_BARS)
+    best = {strat: _first_params(strat) for strat in strategy_params}
+    return lambda: [stack_by_correlation(p, best) for p in universe.values()]
+
+
+# === Harness ===
+def parse_count(text):
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def measure(thunk, repeat):
+    t0 = time.perf_counter()
+    thunk()
+    first = time.perf_counter() - t0
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        thunk()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        thunk()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "first_s": first,
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def _environment():
+    env = {"python": platform.python_version(), "platform": platform.platform()}
+    for mod in ("numpy", "pandas", "vectorbt", "numba", "scipy"):
+        try:
+            env[mod] = __import__(mod).__version__
+        except Exception:
+            env[mod] = None
+    return env
+
+
+def run_all(sizes, ticker_counts, repeat=3, name_filter=None, run_all_sizes=False):
+    # (name, fn, arg, limit, bars, tickers): bar cases scale with bars,
+    # universe cases with the number of tickers
+    jobs = [(name, fn, bars, limit, bars, 1) for name, fn, limit in BAR_CASES for bars in sizes]
+    jobs += [(name, fn, n, limit, UNIVERSE_BARS, n) for name, fn, limit in TICKER_CASES for n in ticker_counts]
+
+    results = []
+    for name, fn, arg, limit, bars, n_tickers in jobs:
+        if name_filter and name_filter not in name:
+            continue
+        row = {"name": name, "bars": bars, "tickers": n_tickers}
+        if limit and arg > limit and not run_all_sizes:
+            row["skipped"] = f"above limit {limit:,} (use --all)"
+        else:
+            # One failing case is recorded on its row instead of ending the run
+            try:
+                row.update(measure(fn(arg), repeat))
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+        if "best_s" in row:
+            outcome = f"best={row['best_s']:.4f}s peak={row['peak_mb']:.1f}MB"
+        else:
+            outcome = row.get("skipped") or f"ERROR {row['error']}"
+        print(f"[BENCH] {name:45s} bars={bars:>9,} tickers={n_tickers:>4} {outcome}")
+        results.append(row)
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def _key(row):
+    return (row["name"], row["bars"], row["tickers"])
+
+
+def compare(current, baseline, tolerance=0.15, mem_tolerance=0.25):
+    """Rows whose best time or peak memory got worse than the baseline by more than tolerance."""
+    base = {_key(r): r for r in baseline["results"] if "best_s" in r}
+    regressions = []
+    for row in current["results"]:
+        old = base.get(_key(row))
+        if old is None or "best_s" not in row:
+            if old is not None and "error" in row:
+                print(f"[{'ERROR':10s}] {row['name']:45s} bars={row['bars']:>9,} tickers={row['tickers']:>4} "
+                      f"{row['error']}")
+                regressions.append(row)
+            continue
+        time_ratio = row["best_s"] / old["best_s"] if old["best_s"] else 1.0
+        mem_ratio = row["peak_mb"] / old["peak_mb"] if old["peak_mb"] else 1.0
+        status = "ok"
+        if time_ratio > 1 + tolerance or mem_ratio > 1 + mem_tolerance:
+            status = "REGRESSION"
+            regressions.append(row)
+        elif time_ratio < 1 - tolerance:
+            status = "faster"
+        print(f"[{status:10s}] {row['name']:45s} bars={row['bars']:>9,} tickers={row['tickers']:>4} "
+              f"time x{time_ratio:.2f}  mem x{mem_ratio:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="run benchmarks and write JSON results")
+    p_run.add_argument("--sizes", default=DEFAULT_SIZES, help="bar counts, e.g. 1k,10k,1M")
+    p_run.add_argument("--tickers", default=DEFAULT_TICKERS, help="ticker counts for universe cases")
+    p_run.add_argument("--repeat", type=int, default=3)
+    p_run.add_argument("--filter", default=None, help="only cases whose name contains this text")
+    p_run.add_argument("--all", action="store_true", help="ignore per-case size limits")
+    p_run.add_argument("--out", default="bench_results.json")
+    p_run.add_argument("--compare", default=None, metavar="BASELINE", help="compare against a saved run")
+    p_run.add_argument("--tolerance", type=float, default=0.15)
+
+    p_cmp = sub.add_parser("compare", help="compare two saved runs")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("--tolerance", type=float, default=0.15)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        sizes = [parse_count(s) for s in args.sizes.split(",") if s.strip()]
+        tickers = [parse_count(s) for s in args.tickers.split(",") if s.strip()]
+        current = run_all(sizes, tickers, args.repeat, args.filter, args.all)
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"[BENCH] wrote {args.out}")
+        baseline_path = args.compare
+    else:
+        with open(args.current) as f:
+            current = json.load(f)
+        baseline_path = args.baseline
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
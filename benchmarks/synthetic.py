@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+# Above this many bars the generator switches to minute bars so the index
+# stays inside pandas' Timestamp range.
+_DAILY_LIMIT = 50_000
+
+
+def make_ohlcv(n_bars, seed=0, start="2000-01-03", freq=None):
+    """
+    Seeded geometric-random-walk OHLCV frame with a DatetimeIndex.
+    Columns match what SupportResistanceFinder expects.
+    """
+    rng = np.random.default_rng(seed)
+    # Calendar days, not "B": vectorbt converts the index freq to a Timedelta
+    # for daily returns and stats, and a BusinessDay offset has no fixed length
+    freq = freq or ("D" if n_bars <= _DAILY_LIMIT else "min")
+    index = pd.date_range(start, periods=n_bars, freq=freq)
+
+    log_ret = rng.normal(0.0002, 0.012, n_bars)
+    close = 100.0 * np.exp(np.cumsum(log_ret))
+    open_ = np.empty(n_bars)
+    open_[0] = close[0]
+    open_[1:] = close[:-1] * np.exp(rng.normal(0.0, 0.002, n_bars - 1))
+    spread = np.abs(rng.normal(0.0, 0.006, n_bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(13.0, 0.5, n_bars).astype(np.int64)
+
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+def make_price(n_bars, seed=0):
+    """Close-only Series, the shape get_price_data returns."""
+    return make_ohlcv(n_bars, seed)["Close"].rename(None)
+
+
+def make_universe(n_tickers, n_bars, seed=0):
+    """{ticker: close Series}; every ticker gets its own seed derived from seed."""
+    return {
+        f"SYN{i:04d}": make_price(n_bars, seed=seed * 100_003 + i)
+        for i in range(n_tickers)
+    }
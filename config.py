@@ -1,3 +1,5 @@
+import os
+
 # Strategy parameter grids for optimization
 strategy_params = {
     "MA": {
@@ -31,4 +33,14 @@ strategy_params = {
 }
 
 # Initial cash for backtests
-INIT_CASH = 100_000
\ No newline at end of file
+INIT_CASH = 100_000
+
+# Streamlit cache lifetimes (seconds)
+PRICE_CACHE_TTL = 60 * 60
+MACRO_CACHE_TTL = 60 * 60
+OPTIMIZE_CACHE_TTL = 6 * 60 * 60
+BACKTEST_CACHE_TTL = 6 * 60 * 60
+SENTIMENT_CACHE_TTL = 15 * 60
+
+# Compile vectorbt's numba kernels in the background when the app starts
+WARMUP_ON_START = os.getenv("STRATLAB_WARMUP", "1") != "0"
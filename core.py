@@ -1,60 +1,82 @@
 import numpy as np
 import pandas as pd
 import itertools
-import vectorbt as vbt
 from config import strategy_params, INIT_CASH
+from tracing import traced, current_span
 
 def _get_build_signals():
     # Local import avoids circulars and reload issues in Streamlit
     from strategies import build_signals
     return build_signals
 
+def _get_vbt():
+    # vectorbt (numba, plotly) is slow to import; load it on first backtest
+    import vectorbt as vbt
+    return vbt
+
+def param_grid(strat):
+    """All param dicts in config.strategy_params[strat], in grid order."""
+    keys = list(strategy_params[strat].keys())
+    grid_values = list(strategy_params[strat].values())
+    return [dict(zip(keys, params)) for params in itertools.product(*grid_values)]
+
+def window_starts(n_bars, train_window=756, test_window=126):
+    """Start offsets of the rolling walk-forward windows for a series of n_bars."""
+    return list(range(0, n_bars - train_window - test_window + 1, test_window))
+
+def oos_returns(price, strat, param_dict, starts, train_window=756, test_window=126):
+    """Out-of-sample total return of fixed params on each window start."""
+    build_signals = _get_build_signals()
+    vbt = _get_vbt()
+    sp = current_span()
+
+    returns = []
+    for start in starts:
+        # Train slice skipped here; we're evaluating OOS test slice on fixed params
+        test_slice = price.iloc[start + train_window : start + train_window + test_window]
+        entries, exits = build_signals(test_slice, strat, param_dict)
+        pf = vbt.Portfolio.from_signals(
+            test_slice, entries, exits, init_cash=INIT_CASH, fees=0.001
+        )
+        returns.append(float(pf.total_return()))
+        sp.count("windows")
+    return returns
+
+@traced("optimize")
 def walk_forward_optimize(price, strat, train_window=756, test_window=126):
     """
     Walk-forward optimization over rolling train/test windows.
     Returns best_params dict and best out-of-sample average return.
     """
-    build_signals = _get_build_signals()
-
     # Build the param grid from config.strategy_params[strat]
-    grid_values = list(strategy_params[strat].values())
-    param_grid = list(itertools.product(*grid_values))
-    keys = list(strategy_params[strat].keys())
+    grid = param_grid(strat)
+    starts = window_starts(len(price), train_window, test_window)
+    current_span().set(strategy=strat, rows=len(price), param_combos=len(grid))
 
     best_params = None
     best_score = -np.inf
 
-    for params in param_grid:
-        param_dict = dict(zip(keys, params))
-        oos_returns = []
-        start = 0
-
-        while start + train_window + test_window <= len(price):
-            # Train slice skipped here; we're evaluating OOS test slice on fixed params
-            test_slice = price.iloc[start + train_window : start + train_window + test_window]
-            entries, exits = build_signals(test_slice, strat, param_dict)
-            pf = vbt.Portfolio.from_signals(
-                test_slice, entries, exits, init_cash=INIT_CASH, fees=0.001
-            )
-            oos_returns.append(float(pf.total_return()))
-            start += test_window
-
-        avg_return = float(np.mean(oos_returns)) if oos_returns else -np.inf
+    for param_dict in grid:
+        returns = oos_returns(price, strat, param_dict, starts, train_window, test_window)
+        avg_return = float(np.mean(returns)) if returns else -np.inf
         if avg_return > best_score:
             best_score = avg_return
             best_params = param_dict
 
     return best_params, best_score
 
-def run_backtest(price, strat, params):
-    """Run a backtest for a single strategy with given params."""
+@traced("backtest")
+def run_backtest(price, strat, params, sentiment=None, min_sentiment=0.0):
+    """Run a backtest for a single strategy with given params (optionally sentiment-gated)."""
     build_signals = _get_build_signals()
-    entries, exits = build_signals(price, strat, params)
+    vbt = _get_vbt()
+    current_span().set(strategy=strat, rows=len(price))
+    entries, exits = build_signals(price, strat, params, sentiment=sentiment, min_sentiment=min_sentiment)
     pf = vbt.Portfolio.from_signals(price, entries, exits, init_cash=INIT_CASH, fees=0.001)
     return pf
 
-def stack_strategies(price, strategies_with_params):
-    """Combine multiple strategies with OR logic (any entry/exit triggers)."""
+def stacked_signals(price, strategies_with_params):
+    """OR-combine entries/exits of several strategies (any entry/exit triggers)."""
     build_signals = _get_build_signals()
     entry_stack = pd.Series(False, index=price.index)
     exit_stack  = pd.Series(False, index=price.index)
@@ -68,15 +90,25 @@ def stack_strategies(price, strategies_with_params):
         entry_stack |= entries
         exit_stack  |= exits
 
+    return entry_stack, exit_stack
+
+@traced("stack")
+def stack_strategies(price, strategies_with_params):
+    """Combine multiple strategies with OR logic (any entry/exit triggers)."""
+    vbt = _get_vbt()
+    entry_stack, exit_stack = stacked_signals(price, strategies_with_params)
     pf = vbt.Portfolio.from_signals(price, entry_stack, exit_stack, init_cash=INIT_CASH, fees=0.001)
+    current_span().set(mode="or", strategies=len(strategies_with_params))
     return pf
 
+@traced("stack")
 def stack_by_correlation(price, strategies_with_params, lookback=252, corr_threshold=0.3, metric='returns'):
     """
     Greedy stacking: start from one strategy, add others whose correlation
     with the current stack is below threshold. Correlation can be based on returns or signals.
     """
     build_signals = _get_build_signals()
+    vbt = _get_vbt()
     series_dict = {}
     portfolios = {}
 
@@ -132,17 +164,25 @@ def stack_by_correlation(price, strategies_with_params, lookback=252, corr_thres
                 stack_vector = pd.concat([stack_vector, s], axis=1).mean(axis=1)
 
     # Combine chosen strategies entries/exits (OR logic)
-    entry_stack = pd.Series(False, index=price.index)
-    exit_stack  = pd.Series(False, index=price.index)
-    for strat in chosen:
-        params = strategies_with_params[strat]
-        entries, exits = build_signals(price, strat, params)
-        if isinstance(entries, pd.DataFrame):
-            entries = entries.any(axis=1)
-        if isinstance(exits, pd.DataFrame):
-            exits = exits.any(axis=1)
-        entry_stack |= entries
-        exit_stack  |= exits
+    entry_stack, exit_stack = stacked_signals(price, {s: strategies_with_params[s] for s in chosen})
 
     pf = vbt.Portfolio.from_signals(price, entry_stack, exit_stack, init_cash=INIT_CASH, fees=0.001)
-    return pf, chosen
\ No newline at end of file
+    current_span().set(mode="correlation", strategies=len(strategies_with_params), chosen=len(chosen))
+    return pf, chosen
+
+def build_portfolio(price, best_strats, strat_scores, stack_mode="correlation",
+                    corr_threshold=0.3, corr_metric="returns", lookback=252):
+    """
+    Backtest the optimized strategies the way the app does for a stacking mode:
+    'none' (best single strategy), 'or' or 'correlation'.
+    Returns (pf, chosen_strats); pf is None when nothing was optimized.
+    """
+    if not best_strats:
+        return None, []
+    if stack_mode == "none":
+        top_strat = max(strat_scores.items(), key=lambda x: x[1])[0]
+        return run_backtest(price, top_strat, best_strats[top_strat]), [top_strat]
+    if stack_mode == "or":
+        return stack_strategies(price, best_strats), list(best_strats.keys())
+    return stack_by_correlation(price, best_strats, lookback=lookback,
+                                corr_threshold=corr_threshold, metric=corr_metric)
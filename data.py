@@ -1,25 +1,34 @@
-import yfinance as yf
 import pandas as pd
 import requests
 
+from providers import call
+from tracing import traced, current_span
+
 # === API KEYS ===
 ALPHA_KEY = "2F6D8A5BI2BTG7QV"   # get free at https://www.alphavantage.co
 FMP_KEY   = "BCsXgMHJYdsOpjiM2gB4E9NGS9utzlAj"  # get free at https://financialmodelingprep.com/developer
 
 
 # === Primary fetch: Yahoo Finance ===
-def fetch_yahoo(ticker, start=None, end=None, interval="1d"):
-    try:
+def _yahoo_download(ticker, start=None, end=None, interval="1d"):
+    def download():
+        import yfinance as yf  # deferred: slow import, only needed on fetch
         if start and end:
-            df = yf.download(
+            return yf.download(
                 ticker, start=start, end=end,
                 interval=interval, auto_adjust=True, progress=False
             )
-        else:
-            df = yf.download(
-                ticker, period="max",
-                interval=interval, auto_adjust=True, progress=False
-            )
+        return yf.download(
+            ticker, period="max",
+            interval=interval, auto_adjust=True, progress=False
+        )
+    # Close-only and OHLCV fetches share one recording per download
+    return call("yahoo", ("download", ticker, start, end, interval), download)
+
+
+def fetch_yahoo(ticker, start=None, end=None, interval="1d"):
+    try:
+        df = _yahoo_download(ticker, start, end, interval)
 
         if df.empty or "Close" not in df.columns:
             return pd.Series(dtype=float)
@@ -29,6 +38,21 @@ def fetch_yahoo(ticker, start=None, end=None, interval="1d"):
         return pd.Series(dtype=float)
 
 
+# === Full OHLCV (for the memory-mapped price store) ===
+def fetch_yahoo_ohlcv(ticker, start=None, end=None, interval="1d"):
+    try:
+        df = _yahoo_download(ticker, start, end, interval)
+
+        if isinstance(df.columns, pd.MultiIndex):
+            df.columns = df.columns.get_level_values(0)
+        if df.empty or "Close" not in df.columns:
+            return pd.DataFrame()
+        return df[["Open", "High", "Low", "Close", "Volume"]].dropna(subset=["Close"])
+    except Exception as e:
+        print(f"[Yahoo ERROR] {ticker}: {e}")
+        return pd.DataFrame()
+
+
 # === Fallback 1: Alpha Vantage (via requests) ===
 def fetch_alpha(ticker, start=None, end=None):
     try:
@@ -37,8 +61,8 @@ def fetch_alpha(ticker, start=None, end=None):
             f"function=TIME_SERIES_DAILY_ADJUSTED&symbol={ticker}"
             f"&outputsize=full&apikey={ALPHA_KEY}"
         )
-        r = requests.get(url)
-        data = r.json().get("Time Series (Daily)", {})
+        payload = call("alpha", ("daily_adjusted", ticker), lambda: requests.get(url).json())
+        data = payload.get("Time Series (Daily)", {})
         if not data:
             return pd.Series(dtype=float)
 
@@ -62,8 +86,8 @@ def fetch_alpha(ticker, start=None, end=None):
 def fetch_fmp(ticker, start=None, end=None):
     try:
         url = f"https://financialmodelingprep.com/api/v3/historical-price-full/{ticker}?apikey={FMP_KEY}"
-        r = requests.get(url)
-        data = r.json().get("historical", [])
+        payload = call("fmp", ("historical", ticker), lambda: requests.get(url).json())
+        data = payload.get("historical", [])
         if not data:
             return pd.Series(dtype=float)
 
@@ -84,26 +108,37 @@ def fetch_fmp(ticker, start=None, end=None):
 
 
 # === Unified function for stocks ===
+@traced("fetch")
 def get_price_data(ticker, start=None, end=None):
+    sp = current_span()
+    sp.set(ticker=ticker)
+
     # Try Yahoo first
     series = fetch_yahoo(ticker, start, end)
+    sp.count("provider_calls")
     if not series.empty:
         print(f"[INFO] Yahoo returned {len(series)} rows for {ticker}")
+        sp.set(provider="Yahoo", rows=len(series))
         return series
 
     # Try Alpha Vantage
     series = fetch_alpha(ticker, start, end)
+    sp.count("provider_calls")
     if not series.empty:
         print(f"[INFO] Alpha Vantage returned {len(series)} rows for {ticker}")
+        sp.set(provider="Alpha Vantage", rows=len(series))
         return series
 
     # Try FMP
     series = fetch_fmp(ticker, start, end)
+    sp.count("provider_calls")
     if not series.empty:
         print(f"[INFO] FMP returned {len(series)} rows for {ticker}")
+        sp.set(provider="FMP", rows=len(series))
         return series
 
     print(f"[FAIL] No data for {ticker}")
+    sp.set(rows=0)
     return pd.Series(dtype=float)
 
 
@@ -116,6 +151,7 @@ MACRO_SYMBOLS = {
 }
 
 
+@traced("macro")
 def get_macro_data(start=None, end=None, selection=None):
     """
     Fetch macroeconomic data with fallback logic.
@@ -124,6 +160,7 @@ def get_macro_data(start=None, end=None, selection=None):
     """
     selection = selection or ["VIX", "US10Y", "DXY", "SPY"]
     macro_data = {}
+    current_span().set(symbols=len(selection))
 
     for name in selection:
         symbol = MACRO_SYMBOLS.get(name)
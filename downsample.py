@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Plotly draws at most a couple of distinct points per horizontal pixel, so
+# anything beyond that only inflates the browser payload.
+POINTS_PER_PIXEL = 2
+MIN_POINTS = 200
+
+
+def point_budget(width_px, points_per_px=POINTS_PER_PIXEL):
+    """Number of points worth sending for a chart of the given pixel width."""
+    return max(MIN_POINTS, int(width_px * points_per_px))
+
+
+def _x_values(index):
+    """Numeric x-axis for the triangle areas (datetimes become int64 ns)."""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    try:
+        return np.asarray(index, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.arange(len(index), dtype=np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: pick n_out positions that keep the visual
+    shape of (x, y). First and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (n_out - 2)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        # Average of the following bucket is the third triangle vertex
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        ax, ay = x[a], y[a]
+        area = np.abs(
+            (ax - avg_x) * (y[start:end] - ay) - (ax - x[start:end]) * (avg_y - ay)
+        )
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+
+    return idx
+
+
+def downsample_series(series, n_out):
+    """Return a visually equivalent subset of series with at most n_out points."""
+    if series is None or len(series) <= n_out:
+        return series
+    series = series.dropna()
+    if len(series) <= n_out:
+        return series
+    x = _x_values(series.index)
+    y = series.to_numpy(dtype=np.float64)
+    return series.iloc[lttb_indices(x, y, n_out)]
+
+
+def slice_window(series, window):
+    """Restrict series to a (start, end) window; None leaves it untouched."""
+    if window is None or series is None:
+        return series
+    start, end = window
+    return series.loc[pd.Timestamp(start):pd.Timestamp(end)]
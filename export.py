@@ -0,0 +1,210 @@
+"""
+Columnar export of a whole multi-ticker run.
+
+A bundle is a directory of Parquet tables (zstd-compressed):
+
+    <bundle>/trades/part-*.parquet    one row per trade, all tickers
+    <bundle>/equity/part-*.parquet    portfolio value per bar
+    <bundle>/signals/part-*.parquet   entry/exit flags per bar
+    <bundle>/params/part-*.parquet    optimized params and OOS score per strategy
+    <bundle>/stats/part-*.parquet     pf.stats() in long form
+    <bundle>/manifest.json            tickers and row counts per part
+
+RunExporter keeps one ParquetWriter per table open and appends a row group
+as each ticker finishes, so a run streams to disk instead of being held in
+memory. Every open of a bundle writes a new part, which lets a resumed batch
+sweep add to an existing bundle. Parts are written as *.parquet.tmp and
+renamed when the exporter closes, so a process killed mid-run leaves no
+footerless file behind. load_bundle() reads a table across all finished
+parts in one call.
+
+pyarrow is only needed when exporting or loading.
+"""
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TABLES = ["trades", "equity", "signals", "params", "stats"]
+
+
+def _schemas():
+    import pyarrow as pa
+    ts = pa.timestamp("ns")
+    return {
+        "trades": pa.schema([
+            ("ticker", pa.string()), ("trade_id", pa.int64()), ("size", pa.float64()),
+            ("entry_time", ts), ("entry_price", pa.float64()), ("entry_fees", pa.float64()),
+            ("exit_time", ts), ("exit_price", pa.float64()), ("exit_fees", pa.float64()),
+            ("pnl", pa.float64()), ("return", pa.float64()),
+            ("direction", pa.int8()), ("status", pa.int8()),
+        ]),
+        "equity": pa.schema([("ticker", pa.string()), ("timestamp", ts), ("value", pa.float64())]),
+        "signals": pa.schema([
+            ("ticker", pa.string()), ("timestamp", ts), ("entry", pa.bool_()), ("exit", pa.bool_()),
+        ]),
+        "params": pa.schema([
+            ("ticker", pa.string()), ("strategy", pa.string()), ("params", pa.string()),
+            ("score", pa.float64()), ("chosen", pa.bool_()),
+        ]),
+        "stats": pa.schema([
+            ("ticker", pa.string()), ("stat", pa.string()), ("value", pa.float64()), ("text", pa.string()),
+        ]),
+    }
+
+
+def _naive_utc(index):
+    index = pd.DatetimeIndex(index)
+    return index.tz_convert("UTC").tz_localize(None) if index.tz is not None else index
+
+
+def ticker_frames(ticker, pf, entries, exits, best_strats, strat_scores, chosen):
+    """
+    One ticker's rows for every bundle table, as plain DataFrames. Pure pandas,
+    so batch workers can build them and send them back to the writer.
+    """
+    index = _naive_utc(pf.wrapper.index)
+
+    rec = pf.trades.records
+    trades = pd.DataFrame({
+        "ticker": ticker,
+        "trade_id": rec["id"].astype(np.int64),
+        "size": rec["size"],
+        "entry_time": index[rec["entry_idx"]],
+        "entry_price": rec["entry_price"],
+        "entry_fees": rec["entry_fees"],
+        "exit_time": index[rec["exit_idx"]],
+        "exit_price": rec["exit_price"],
+        "exit_fees": rec["exit_fees"],
+        "pnl": rec["pnl"],
+        "return": rec["return"],
+        "direction": rec["direction"].astype(np.int8),
+        "status": rec["status"].astype(np.int8),
+    })
+
+    equity = pd.DataFrame({
+        "ticker": ticker,
+        "timestamp": index,
+        "value": np.asarray(pf.value(), dtype=np.float64).ravel(),
+    })
+
+    signals = pd.DataFrame({
+        "ticker": ticker,
+        "timestamp": _naive_utc(entries.index),
+        "entry": entries.to_numpy(dtype=bool),
+        "exit": exits.to_numpy(dtype=bool),
+    })
+
+    params = pd.DataFrame([
+        {
+            "ticker": ticker,
+            "strategy": strat,
+            "params": json.dumps(p, sort_keys=True, default=str),
+            "score": float(strat_scores.get(strat, np.nan)),
+            "chosen": strat in chosen,
+        }
+        for strat, p in best_strats.items()
+    ], columns=["ticker", "strategy", "params", "score", "chosen"])
+
+    stat_rows = []
+    for name, value in pf.stats().items():
+        numeric = isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+        stat_rows.append({
+            "ticker": ticker,
+            "stat": str(name),
+            "value": float(value) if numeric else np.nan,
+            "text": None if numeric else str(value),
+        })
+    stats = pd.DataFrame(stat_rows, columns=["ticker", "stat", "value", "text"])
+
+    return {"trades": trades, "equity": equity, "signals": signals, "params": params, "stats": stats}
+
+
+class RunExporter:
+    """
+    Stream per-ticker results into a Parquet bundle.
+
+        with RunExporter("runs/2024-06-01") as bundle:
+            for ticker in tickers:
+                ...
+                bundle.write(ticker_frames(ticker, pf, entries, exits, best, scores, chosen))
+    """
+
+    def __init__(self, path, compression="zstd"):
+        import pyarrow.parquet as pq
+        self.path = Path(path)
+        self.part = f"part-{time.strftime('%Y%m%d-%H%M%S')}-{id(self) & 0xffff:04x}.parquet"
+        self.schemas = _schemas()
+        self.writers = {}
+        self.rows = {name: 0 for name in TABLES}
+        self.tickers = []
+        for name in TABLES:
+            (self.path / name).mkdir(parents=True, exist_ok=True)
+            self.writers[name] = pq.ParquetWriter(self._tmp(name), self.schemas[name],
+                                                  compression=compression)
+
+    def _tmp(self, name):
+        return self.path / name / f"{self.part}.tmp"
+
+    def write(self, frames):
+        """Append one ticker (output of ticker_frames) as a row group per table."""
+        import pyarrow as pa
+        for name, df in frames.items():
+            if df.empty:
+                continue
+            table = pa.Table.from_pandas(df, schema=self.schemas[name], preserve_index=False)
+            self.writers[name].write_table(table)
+            self.rows[name] += len(df)
+        ticker = next((df["ticker"].iloc[0] for df in frames.values() if not df.empty), None)
+        if ticker is not None:
+            self.tickers.append(ticker)
+
+    def close(self):
+        for name, writer in self.writers.items():
+            writer.close()
+            # Footer is written: publish the part under its final name
+            self._tmp(name).replace(self.path / name / self.part)
+        self.writers = {}
+
+        manifest_path = self.path / "manifest.json"
+        manifest = {"parts": []}
+        if manifest_path.exists():
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        manifest["parts"].append({"file": self.part, "tickers": self.tickers, "rows": self.rows})
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def exported_tickers(path):
+    """Tickers in the finished parts of a bundle, per its manifest."""
+    manifest_path = Path(path) / "manifest.json"
+    if not manifest_path.exists():
+        return set()
+    with open(manifest_path) as f:
+        return {t for part in json.load(f)["parts"] for t in part["tickers"]}
+
+
+def load_bundle(path, tables=None, tickers=None):
+    """
+    {table: DataFrame} for a bundle. tickers filters rows at read time
+    (Parquet predicate pushdown), so a single name does not load the whole run.
+    """
+    import pyarrow.dataset as ds
+    out = {}
+    for name in tables or TABLES:
+        # Finished parts only; *.parquet.tmp files are left by killed runs
+        parts = sorted(str(p) for p in (Path(path) / name).glob("*.parquet"))
+        dataset = ds.dataset(parts, format="parquet", schema=_schemas()[name])
+        flt = ds.field("ticker").isin(list(tickers)) if tickers else None
+        out[name] = dataset.to_table(filter=flt).to_pandas()
+    return out
@@ -0,0 +1,184 @@
+"""
+Parallel walk-forward evaluation over shared price buffers.
+
+A plain process pool would pickle the price Series into every task. Here the
+parent publishes each ticker's values and timestamps once, either into
+multiprocessing.shared_memory or, for a PriceStore ticker, as a reference to
+its memory-mapped files. Workers attach without copying, evaluate their
+slice of (strategy, params, windows) and send back only small arrays of
+return sums and counts.
+
+    from parallel import walk_forward_optimize_parallel
+    best = walk_forward_optimize_parallel(price, ["MA", "RSI", "MACD"], max_workers=8)
+    # {"MA": (best_params, best_score), ...}
+"""
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from core import param_grid, window_starts, oos_returns
+
+
+def _open_shm(name):
+    """Attach to an existing block; the publishing process owns the unlink."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        # Workers share the parent's resource tracker, which already holds the
+        # block and forgets it when the parent unlinks. Unregistering here
+        # would make that unlink report a KeyError from the tracker.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedPrice:
+    """
+    A price Series published once for worker processes.
+    Use as a context manager; shared memory is released on exit.
+    """
+
+    def __init__(self, price):
+        values = np.ascontiguousarray(price.to_numpy(dtype=np.float64))
+        stamps = pd.DatetimeIndex(price.index).as_unit("ns").asi8
+        self._blocks = []
+        self.descriptor = {
+            "kind": "shm",
+            "n": len(values),
+            "name": price.name,
+            "values": self._publish(values),
+            "index": self._publish(stamps),
+        }
+
+    @classmethod
+    def from_store(cls, store, ticker, col="Close"):
+        """Reference a PriceStore column in place; nothing is copied."""
+        self = cls.__new__(cls)
+        self._blocks = []
+        start, stop = store._range(ticker)
+        self.descriptor = {
+            "kind": "mmap",
+            "n": stop - start,
+            "name": ticker,
+            "values": (str(store._path(ticker, col)), store.meta["length"], start),
+            "dtype": np.dtype(store.column(ticker, col).dtype).str,
+            "index": (str(store.root / "index.i8"), store.meta["length"], start),
+        }
+        return self
+
+    def _publish(self, array):
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        self._blocks.append(shm)
+        return (shm.name, array.dtype.str)
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# Worker-side attachments, kept for the life of the worker process so
+# repeated tasks on the same ticker do not re-open the buffers.
+_attached = {}
+
+
+def attach(descriptor):
+    """Rebuild the price Series in a worker as a view over the shared buffer."""
+    key = (descriptor["kind"], str(descriptor["values"]))
+    if key in _attached:
+        return _attached[key][0]
+
+    n = descriptor["n"]
+    if descriptor["kind"] == "shm":
+        val_name, val_dtype = descriptor["values"]
+        idx_name, idx_dtype = descriptor["index"]
+        val_shm, idx_shm = _open_shm(val_name), _open_shm(idx_name)
+        values = np.ndarray((n,), dtype=val_dtype, buffer=val_shm.buf)
+        stamps = np.ndarray((n,), dtype=idx_dtype, buffer=idx_shm.buf)
+        handles = (val_shm, idx_shm)
+    else:
+        val_path, length, start = descriptor["values"]
+        idx_path, _, _ = descriptor["index"]
+        values = np.memmap(val_path, dtype=descriptor["dtype"], mode="r", shape=(length,))[start:start + n]
+        stamps = np.memmap(idx_path, dtype=np.int64, mode="r", shape=(length,))[start:start + n]
+        handles = ()
+
+    price = pd.Series(values, index=pd.DatetimeIndex(stamps.view("M8[ns]")),
+                      name=descriptor["name"], copy=False)
+    _attached[key] = (price, handles)
+    return price
+
+
+def _evaluate(descriptor, strat, params_list, starts, train_window, test_window):
+    """Worker task: (sums, counts) of OOS returns for each params dict over starts."""
+    price = attach(descriptor)
+    sums = np.zeros(len(params_list))
+    counts = np.zeros(len(params_list), dtype=np.int64)
+    for i, params in enumerate(params_list):
+        returns = oos_returns(price, strat, params, starts, train_window, test_window)
+        sums[i] = np.sum(returns)
+        counts[i] = len(returns)
+    return sums, counts
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)] or [[]]
+
+
+def walk_forward_optimize_parallel(price, strategies, max_workers=None, train_window=756,
+                                   test_window=126, param_chunk=4, window_chunk=8,
+                                   shared=None):
+    """
+    Same result as calling core.walk_forward_optimize for each strategy, with the
+    (params x windows) work split into tasks across processes.
+    Pass shared=SharedPrice.from_store(...) to evaluate straight from a PriceStore.
+    Returns {strat: (best_params, best_score)}.
+    """
+    owns_shared = shared is None
+    shared = shared or SharedPrice(price)
+    n_bars = shared.descriptor["n"]
+    starts = window_starts(n_bars, train_window, test_window)
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            jobs = []
+            for strat in strategies:
+                grid = param_grid(strat)
+                for p_lo in range(0, len(grid), param_chunk):
+                    params_list = grid[p_lo:p_lo + param_chunk]
+                    for window_subset in _chunks(starts, window_chunk):
+                        job = pool.submit(_evaluate, shared.descriptor, strat, params_list,
+                                          window_subset, train_window, test_window)
+                        jobs.append((strat, p_lo, len(params_list), job))
+
+            totals = {strat: (np.zeros(len(param_grid(strat))),
+                              np.zeros(len(param_grid(strat)), dtype=np.int64))
+                      for strat in strategies}
+            for strat, p_lo, size, job in jobs:
+                sums, counts = job.result()
+                totals[strat][0][p_lo:p_lo + size] += sums
+                totals[strat][1][p_lo:p_lo + size] += counts
+    finally:
+        if owns_shared:
+            shared.close()
+
+    results = {}
+    for strat in strategies:
+        sums, counts = totals[strat]
+        scores = np.where(counts > 0, sums / np.maximum(counts, 1), -np.inf)
+        grid = param_grid(strat)
+        # First maximum wins, matching the strict '>' in walk_forward_optimize
+        best = int(np.argmax(scores))
+        if np.isfinite(scores[best]):
+            results[strat] = (grid[best], float(scores[best]))
+        else:
+            results[strat] = (None, -np.inf)
+    return results
@@ -0,0 +1,169 @@
+"""
+Memory-mapped OHLCV storage for long/intraday histories.
+
+Layout of a store directory:
+    index.i8             shared timestamps, int64 ns since epoch
+    meta.json            length, dtypes and each ticker's valid [start, stop) range
+    <TICKER>/Open.f4     float32 columns, one value per shared index position
+    <TICKER>/High.f4
+    <TICKER>/Low.f4
+    <TICKER>/Close.f4
+    <TICKER>/Volume.i8   int64
+
+Every column is a contiguous file the OS pages in on demand, so series()/frame()
+return views over the mapping instead of loading data into RAM. Bars a ticker
+does not have are NaN (volume 0); reads are trimmed to the ticker's first/last
+valid bar, which keeps them zero-copy.
+"""
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+COLUMNS = {
+    "Open": np.float32,
+    "High": np.float32,
+    "Low": np.float32,
+    "Close": np.float32,
+    "Volume": np.int64,
+}
+_SUFFIX = {np.float32: ".f4", np.int64: ".i8"}
+
+
+class PriceStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        with open(self.root / "meta.json") as f:
+            self.meta = json.load(f)
+        self._index = None
+
+    # === Creation ===
+    @classmethod
+    def create(cls, root, index):
+        """New empty store over a shared timestamp index (sorted, unique)."""
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        if not (index.is_monotonic_increasing and index.is_unique):
+            raise ValueError("store index must be sorted and unique")
+
+        mm = np.memmap(root / "index.i8", dtype=np.int64, mode="w+", shape=(len(index),))
+        # Stored as int64 nanoseconds whatever unit the index uses (pandas 2+ allows s/ms/us)
+        mm[:] = index.as_unit("ns").asi8
+        mm.flush()
+        with open(root / "meta.json", "w") as f:
+            json.dump({"length": len(index), "tickers": {}}, f, indent=2)
+        return cls(root)
+
+    @classmethod
+    def from_frames(cls, root, frames):
+        """Create a store from {ticker: OHLCV DataFrame} on the union of their indexes."""
+        index = None
+        for df in frames.values():
+            index = df.index if index is None else index.union(df.index)
+        store = cls.create(root, index.sort_values().unique())
+        for ticker, df in frames.items():
+            store.write(ticker, df)
+        return store
+
+    def _path(self, ticker, col):
+        return self.root / ticker / f"{col}{_SUFFIX[COLUMNS[col]]}"
+
+    def _save_meta(self):
+        with open(self.root / "meta.json", "w") as f:
+            json.dump(self.meta, f, indent=2)
+
+    def write(self, ticker, df):
+        """
+        Write (or extend) a ticker's OHLCV. df rows are placed at their positions
+        in the shared index, so a long history can be written in several chunks.
+        """
+        n = self.meta["length"]
+        (self.root / ticker).mkdir(exist_ok=True)
+
+        idx = pd.DatetimeIndex(df.index)
+        if idx.tz is not None:
+            idx = idx.tz_convert("UTC").tz_localize(None)
+        pos = self.index.get_indexer(idx)
+        if (pos < 0).any():
+            print(f"[Store WARN] {ticker}: {(pos < 0).sum()} bars not in store index were dropped")
+            keep = pos >= 0
+            df, pos = df[keep], pos[keep]
+        if len(pos) == 0:
+            return
+
+        for col, dtype in COLUMNS.items():
+            path = self._path(ticker, col)
+            if not path.exists():
+                mm = np.memmap(path, dtype=dtype, mode="w+", shape=(n,))
+                mm[:] = np.nan if dtype == np.float32 else 0
+            else:
+                mm = np.memmap(path, dtype=dtype, mode="r+", shape=(n,))
+            if col in df:
+                values = df[col].to_numpy()
+                if dtype == np.int64:
+                    values = np.nan_to_num(values).astype(np.int64)
+                mm[pos] = values
+            mm.flush()
+            del mm
+
+        old = self.meta["tickers"].get(ticker)
+        start, stop = int(pos.min()), int(pos.max()) + 1
+        if old:
+            start, stop = min(start, old["start"]), max(stop, old["stop"])
+        self.meta["tickers"][ticker] = {"start": start, "stop": stop}
+        self._save_meta()
+
+    # === Reading (zero-copy) ===
+    @property
+    def tickers(self):
+        return list(self.meta["tickers"])
+
+    @property
+    def index(self):
+        if self._index is None:
+            raw = np.memmap(self.root / "index.i8", dtype=np.int64, mode="r",
+                            shape=(self.meta["length"],))
+            self._index = pd.DatetimeIndex(raw.view("M8[ns]"))
+        return self._index
+
+    def _range(self, ticker):
+        r = self.meta["tickers"][ticker]
+        return r["start"], r["stop"]
+
+    def column(self, ticker, col="Close"):
+        """Read-only memmap of a column over the ticker's valid range."""
+        start, stop = self._range(ticker)
+        mm = np.memmap(self._path(ticker, col), dtype=COLUMNS[col], mode="r",
+                       shape=(self.meta["length"],))
+        return mm[start:stop]
+
+    def series(self, ticker, col="Close", start=None, stop=None):
+        """
+        pd.Series view over the mapped column. start/stop are positions within
+        the ticker's range, which is how chunked readers walk long series.
+        """
+        base, _ = self._range(ticker)
+        values = self.column(ticker, col)[start:stop]
+        lo = base + (start or 0)
+        index = self.index[lo:lo + len(values)]
+        return pd.Series(values, index=index, name=ticker, copy=False)
+
+    def frame(self, ticker, start=None, stop=None):
+        """OHLCV DataFrame whose columns are views over the mapped files."""
+        cols = {col: self.series(ticker, col, start, stop) for col in COLUMNS}
+        return pd.DataFrame(cols, copy=False)
+
+    def iter_chunks(self, ticker, chunk_size, overlap=0, col="Close"):
+        """
+        Yield (series, skip) for consecutive chunks of a ticker. Each chunk is
+        prefixed by up to `overlap` earlier bars of warm-up; `skip` is how many
+        leading bars belong to the previous chunk.
+        """
+        start, stop = self._range(ticker)
+        length = stop - start
+        for lo in range(0, length, chunk_size):
+            warm_lo = max(0, lo - overlap)
+            yield self.series(ticker, col, warm_lo, min(lo + chunk_size, length)), lo - warm_lo
@@ -0,0 +1,169 @@
+"""
+Record/replay layer for every network provider (Yahoo, Alpha Vantage, FMP,
+Reddit, NewsAPI).
+
+Fetch code wraps its network call in call(provider, key, fetch):
+
+    live    fetch() runs as before (default)
+    record  fetch() runs and its result is saved to <archive>/<provider>/<hash>.parquet
+            (DataFrames) or <hash>.json (everything else, i.e. API payloads)
+    replay  the result is served from the archive; nothing touches the network
+
+Archives hold only data, never pickles, so loading one received from someone
+else cannot run code.
+
+In replay mode each provider can be given an injected latency and failure
+rate, so concurrency, caching and fallback behaviour can be measured
+reproducibly offline. Injected failures raise ProviderError inside the
+fetch functions' existing try/except blocks, so they take the same fallback
+paths as real outages.
+
+Configure with configure(...) or the environment:
+    STRATLAB_PROVIDER_MODE=replay
+    STRATLAB_ARCHIVE=provider_archive
+    STRATLAB_PROVIDER_LATENCY="yahoo=0.4,reddit=0.9"     # seconds per call
+    STRATLAB_PROVIDER_FAILURES="yahoo=0.1"               # failure probability
+    STRATLAB_PROVIDER_SEED=0
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+MODES = ("live", "record", "replay")
+
+
+class ProviderError(Exception):
+    """Raised for injected failures and for replays with no recording."""
+
+
+def _parse_map(text):
+    out = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            out[name.strip()] = float(value)
+    return out
+
+
+_lock = threading.Lock()
+_config = {}
+_rng = random.Random()
+_stats = defaultdict(lambda: defaultdict(int))
+
+
+def configure(mode=None, archive=None, latency=None, failure_rate=None, seed=None):
+    """Set mode/archive and per-provider latency (s) and failure_rate (0-1) for replay."""
+    with _lock:
+        if mode is not None:
+            if mode not in MODES:
+                raise ValueError(f"mode must be one of {MODES}")
+            _config["mode"] = mode
+        if archive is not None:
+            _config["archive"] = Path(archive)
+        if latency is not None:
+            _config["latency"] = dict(latency)
+        if failure_rate is not None:
+            _config["failure_rate"] = dict(failure_rate)
+        if seed is not None:
+            _rng.seed(seed)
+
+
+configure(
+    mode=os.getenv("STRATLAB_PROVIDER_MODE", "live"),
+    archive=os.getenv("STRATLAB_ARCHIVE", "provider_archive"),
+    latency=_parse_map(os.getenv("STRATLAB_PROVIDER_LATENCY")),
+    failure_rate=_parse_map(os.getenv("STRATLAB_PROVIDER_FAILURES")),
+    seed=int(os.getenv("STRATLAB_PROVIDER_SEED", "0")),
+)
+
+
+def mode():
+    return _config["mode"]
+
+
+def replaying():
+    return _config["mode"] == "replay"
+
+
+def _count(provider, name):
+    with _lock:
+        _stats[provider][name] += 1
+
+
+def _archive_path(provider, key):
+    """Archive path without suffix: .parquet for DataFrames, .json otherwise."""
+    digest = hashlib.sha1(repr(tuple(str(k) for k in key)).encode("utf-8")).hexdigest()
+    return _config["archive"] / provider / digest
+
+
+def _save(path, provider, key, result):
+    import pandas as pd  # deferred: only recording and replay touch pandas here
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(result, pd.DataFrame):
+        final = path.with_suffix(".parquet")
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        result.to_parquet(tmp)
+    else:
+        final = path.with_suffix(".json")
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"provider": provider, "key": [str(k) for k in key], "result": result}, f)
+    os.replace(tmp, final)
+
+
+def _load(path):
+    """Recorded result for path, or raise FileNotFoundError."""
+    if path.with_suffix(".parquet").exists():
+        import pandas as pd
+        return pd.read_parquet(path.with_suffix(".parquet"))
+    with open(path.with_suffix(".json")) as f:
+        return json.load(f)["result"]
+
+
+def _inject(provider):
+    delay = _config["latency"].get(provider, 0.0)
+    with _lock:
+        fail = _rng.random() < _config["failure_rate"].get(provider, 0.0)
+    if delay:
+        time.sleep(delay)
+    if fail:
+        _count(provider, "injected_failures")
+        raise ProviderError(f"injected failure for {provider}")
+
+
+def call(provider, key, fetch):
+    """Run fetch() for provider according to the current mode (see module docstring)."""
+    current = _config["mode"]
+    _count(provider, "calls")
+    if current == "live":
+        return fetch()
+
+    path = _archive_path(provider, key)
+    if current == "record":
+        result = fetch()
+        _save(path, provider, key, result)
+        _count(provider, "recorded")
+        return result
+
+    _inject(provider)
+    try:
+        result = _load(path)
+    except FileNotFoundError:
+        _count(provider, "missing")
+        raise ProviderError(f"no recording for {provider} {key}") from None
+    _count(provider, "replayed")
+    return result
+
+
+def stats():
+    """{provider: {calls, recorded, replayed, missing, injected_failures}}."""
+    return {p: dict(counts) for p, counts in _stats.items()}
+
+
+def reset_stats():
+    _stats.clear()
@@ -0,0 +1,213 @@
+"""
+Universe-scale correlation screening: pick a diversified basket of tickers.
+
+Uses the same knobs as core.stack_by_correlation (lookback, corr_threshold),
+applied across tickers instead of across one ticker's strategies:
+
+    panel = returns_panel(prices, lookback=252)
+    corr = correlation_matrix(panel, shrinkage="auto")
+    basket = select_diversified(corr, corr_threshold=0.3, scores=sharpe_scores(panel))
+
+Correlations come from standardized returns multiplied block by block, so a
+2,000-name universe is a handful of BLAS calls. RollingCorrelation keeps the
+sums and cross-products of the window and updates them with a rank-2 change
+when the lookback rolls forward one bar.
+"""
+import numpy as np
+import pandas as pd
+
+
+def returns_panel(prices, lookback=252, min_obs=0.8):
+    """
+    Aligned daily returns for the last `lookback` bars as a DataFrame
+    (bars x tickers). prices is {ticker: Series} or a price DataFrame.
+    Tickers with fewer than min_obs (fraction) valid returns are dropped;
+    remaining gaps are treated as flat (0 return).
+    """
+    if isinstance(prices, dict):
+        prices = pd.concat(prices, axis=1, join="outer").sort_index()
+    returns = prices.pct_change(fill_method=None).iloc[1:].tail(lookback)
+    keep = returns.notna().mean() >= min_obs
+    return returns.loc[:, keep].fillna(0.0)
+
+
+def sharpe_scores(panel):
+    """Per-ticker mean/std of returns over the panel (unannualized)."""
+    std = panel.std()
+    return (panel.mean() / std.replace(0.0, np.nan)).fillna(0.0)
+
+
+def _standardize(x):
+    x = x - x.mean(axis=0)
+    std = x.std(axis=0, ddof=1)
+    std[std == 0] = np.inf  # flat series: zero correlation with everything
+    return x / std
+
+
+def _shrinkage_intensity(z, corr, block_size):
+    """
+    Ledoit-Wolf intensity for shrinking a correlation matrix toward identity,
+    from the standardized returns z (T x N). Computed block-wise like corr.
+    """
+    t, n = z.shape
+    z2 = z * z
+    pi = 0.0
+    for lo in range(0, n, block_size):
+        hi = min(lo + block_size, n)
+        fourth = z2[:, lo:hi].T @ z2 / t
+        var = fourth - corr[lo:hi] ** 2
+        # The diagonal is never shrunk, so its estimation noise does not count
+        var[np.arange(hi - lo), np.arange(lo, hi)] = 0.0
+        pi += float(var.sum())
+    off = corr - np.eye(n)
+    gamma = float((off ** 2).sum())
+    if gamma == 0:
+        return 0.0
+    return float(np.clip(pi / t / gamma, 0.0, 1.0))
+
+
+def _shrink(corr, shrinkage):
+    corr *= (1 - shrinkage)
+    corr[np.diag_indices_from(corr)] += shrinkage
+    return corr
+
+
+def correlation_matrix(panel, block_size=512, shrinkage=0.0):
+    """
+    Pearson correlation of every ticker pair, computed in column blocks.
+    shrinkage: 0-1 weight toward the identity, or "auto" for Ledoit-Wolf.
+    Returns a DataFrame indexed by ticker on both axes.
+    """
+    z = _standardize(panel.to_numpy(dtype=np.float64))
+    t, n = z.shape
+    corr = np.empty((n, n))
+    for lo in range(0, n, block_size):
+        hi = min(lo + block_size, n)
+        # Upper triangle only; the lower triangle is its mirror
+        block = z[:, lo:hi].T @ z[:, lo:] / (t - 1)
+        corr[lo:hi, lo:] = block
+        corr[lo:, lo:hi] = block.T
+    np.fill_diagonal(corr, 1.0)
+
+    if shrinkage == "auto":
+        shrinkage = _shrinkage_intensity(z, corr, block_size)
+    if shrinkage:
+        corr = _shrink(corr, float(shrinkage))
+    return pd.DataFrame(corr, index=panel.columns, columns=panel.columns)
+
+
+def select_diversified(corr, corr_threshold=0.3, scores=None, method="greedy", max_names=None):
+    """
+    Pick tickers whose correlation stays below corr_threshold.
+
+    method="greedy"   walk tickers best score first and add one when |corr| with
+                      the equal-weighted basket so far is below the threshold
+                      (the rule stack_by_correlation uses for strategies)
+    method="pairwise" same walk, but every pairwise |corr| with the basket
+                      must be below the threshold
+    method="cluster"  average-linkage clusters cut at distance 1 - corr_threshold,
+                      keeping the best-scored ticker of each cluster
+    """
+    tickers = list(corr.index)
+    c = corr.to_numpy()
+    n = len(tickers)
+    if n == 0:
+        return []
+    s = np.zeros(n) if scores is None else pd.Series(scores).reindex(tickers).fillna(-np.inf).to_numpy()
+    # Stable sort keeps the given ticker order among equal scores
+    order = np.argsort(-s, kind="stable")
+
+    if method == "cluster":
+        from scipy.cluster.hierarchy import linkage, fcluster  # deferred: scipy is slow to import
+        from scipy.spatial.distance import squareform
+        dist = 1.0 - np.abs(c)
+        np.fill_diagonal(dist, 0.0)
+        labels = fcluster(linkage(squareform(dist, checks=False), method="average"),
+                          t=1.0 - corr_threshold, criterion="distance")
+        chosen, seen = [], set()
+        for i in order:
+            if labels[i] not in seen:
+                seen.add(labels[i])
+                chosen.append(tickers[i])
+        return chosen[:max_names] if max_names else chosen
+
+    chosen = [order[0]]
+    col_sum = c[:, order[0]].copy()        # sum of corr with each chosen ticker
+    basket_var = c[order[0], order[0]]     # sum of corr within the basket
+    max_abs = np.abs(c[:, order[0]])
+
+    for i in order[1:]:
+        if max_names and len(chosen) >= max_names:
+            break
+        if method == "pairwise":
+            ok = max_abs[i] < corr_threshold
+        else:
+            # corr(x, mean of basket) from the correlation matrix alone
+            ok = abs(col_sum[i] / np.sqrt(basket_var)) < corr_threshold if basket_var > 0 else True
+        if ok:
+            basket_var += 2 * col_sum[i] + c[i, i]
+            col_sum += c[:, i]
+            np.maximum(max_abs, np.abs(c[:, i]), out=max_abs)
+            chosen.append(i)
+
+    return [tickers[i] for i in chosen]
+
+
+class RollingCorrelation:
+    """
+    Correlation over a rolling window, updated in O(N^2) per new bar.
+
+        rc = RollingCorrelation(returns_panel(prices, lookback=252))
+        rc.update(todays_returns)   # Series or array, one value per ticker
+        corr = rc.corr()
+    """
+
+    def __init__(self, panel, shrinkage=0.0, refresh=256):
+        self.columns = panel.columns
+        self.window = panel.to_numpy(dtype=np.float64).copy()
+        self.shrinkage = shrinkage
+        self.refresh = refresh
+        self._head = 0
+        self._updates = 0
+        self._recompute()
+
+    def _recompute(self):
+        self.sums = self.window.sum(axis=0)
+        self.cross = self.window.T @ self.window
+
+    def update(self, row):
+        """Roll the window forward by one bar of returns (NaN counts as 0)."""
+        if isinstance(row, pd.Series):
+            row = row.reindex(self.columns)
+        new = np.nan_to_num(np.asarray(row, dtype=np.float64))
+        old = self.window[self._head].copy()
+        self.window[self._head] = new
+        self._head = (self._head + 1) % len(self.window)
+
+        self._updates += 1
+        if self._updates % self.refresh == 0:
+            # Periodic full rebuild keeps floating-point drift bounded
+            self._recompute()
+        else:
+            self.sums += new - old
+            self.cross += np.outer(new, new) - np.outer(old, old)
+
+    def corr(self):
+        t = len(self.window)
+        cov = (self.cross - np.outer(self.sums, self.sums) / t) / (t - 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        std[std == 0] = np.inf
+        corr = cov / np.outer(std, std)
+        np.fill_diagonal(corr, 1.0)
+        if self.shrinkage:
+            corr = _shrink(corr, float(self.shrinkage))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def screen(prices, lookback=252, corr_threshold=0.3, method="greedy", shrinkage=0.0,
+           max_names=None):
+    """returns_panel -> correlation_matrix -> select_diversified, best Sharpe first."""
+    panel = returns_panel(prices, lookback)
+    corr = correlation_matrix(panel, shrinkage=shrinkage)
+    basket = select_diversified(corr, corr_threshold, sharpe_scores(panel), method, max_names)
+    return basket, corr
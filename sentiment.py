@@ -1,44 +1,228 @@
 import numpy as np
-from textblob import TextBlob
 import requests
-import praw
 import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
-# Reddit API setup
-reddit = praw.Reddit(
-    client_id=os.getenv("REDDIT_CLIENT_ID", ""),
-    client_secret=os.getenv("REDDIT_CLIENT_SECRET", ""),
-    user_agent=os.getenv("REDDIT_USER_AGENT", "StockSentimentBot")
-)
+from config import SENTIMENT_CACHE_TTL
+from providers import call, replaying
+from tracing import traced, current_span
 
-def get_reddit_sentiment(ticker, max_posts=50):
-    scores = []
-    karma_total = 0
+NEWS_URL = "https://newsapi.org/v2/everything"
+
+# === Lazy clients ===
+# praw.Reddit is not thread-safe, so each fetch thread builds its own client on
+# first use. Fetches run on one module-level pool whose threads outlive every
+# batch, so those clients (and their OAuth tokens and keep-alive connections)
+# are reused across calls. Nothing is created at import time.
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+def create_reddit_client():
+    import praw  # deferred: only needed once Reddit is queried
+    return praw.Reddit(
+        client_id=os.getenv("REDDIT_CLIENT_ID", ""),
+        client_secret=os.getenv("REDDIT_CLIENT_SECRET", ""),
+        user_agent=os.getenv("REDDIT_USER_AGENT", "StockSentimentBot")
+    )
+
+def get_reddit_client():
+    if getattr(_local, "reddit", None) is None:
+        _local.reddit = create_reddit_client()
+    return _local.reddit
+
+def get_http_session():
+    if getattr(_local, "http", None) is None:
+        _local.http = requests.Session()
+    return _local.http
+
+def get_executor(max_workers=8):
+    """Shared fetch pool, created on first use; max_workers only applies then."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sentiment")
+        return _executor
+
+
+# === Fetching ===
+def fetch_reddit_posts(ticker, max_posts=50, reddit=None, **search_params):
+    """Return [{id, title, karma, created}] for r/stocks posts mentioning ticker."""
+    def search():
+        client = reddit or get_reddit_client()
+        return [
+            {
+                "id": submission.id,
+                "title": submission.title or "",
+                "karma": submission.score or 0,
+                "created": float(submission.created_utc or 0),
+            }
+            for submission in client.subreddit("stocks").search(ticker, limit=max_posts, **search_params)
+        ]
     try:
-        for submission in reddit.subreddit("stocks").search(ticker, limit=max_posts):
-            title = submission.title or ""
-            karma = submission.score or 0
-            sent = TextBlob(title).sentiment.polarity
-            scores.append(sent * max(1, karma))
-            karma_total += karma
-        avg_sent = np.sum(scores) / karma_total if karma_total > 0 else 0.0
-        return avg_sent, karma_total
+        return call("reddit", ("search", ticker, max_posts, sorted(search_params.items())), search)
     except Exception:
-        return 0.0, 0
+        return []
 
-def get_news_sentiment(ticker, api_key, max_headlines=5):
-    url = "https://newsapi.org/v2/everything"
+def fetch_news_articles(ticker, api_key, max_headlines=5, **extra_params):
+    """Return [{id, title, published}] for NewsAPI headlines about ticker."""
+    if not api_key and not replaying():
+        return []
     params = {
         "q": ticker,
         "pageSize": max_headlines,
         "sortBy": "publishedAt",
         "apiKey": api_key,
-        "language": "en"
+        "language": "en",
+        **extra_params,
     }
     try:
-        r = requests.get(url, params=params)
-        articles = r.json().get("articles", [])
-        scores = [TextBlob(a["title"]).sentiment.polarity for a in articles if a.get("title")]
-        return float(np.mean(scores)) if scores else 0.0
+        # The API key is left out of the recording key so archives are shareable
+        key = ("everything", ticker, max_headlines, sorted(extra_params.items()))
+        payload = call("newsapi", key, lambda: get_http_session().get(NEWS_URL, params=params).json())
+        articles = payload.get("articles", [])
+        return [
+            {
+                "id": a.get("url") or a["title"],
+                "title": a["title"],
+                "published": a.get("publishedAt"),
+            }
+            for a in articles if a.get("title")
+        ]
     except Exception:
-        return 0.0
\ No newline at end of file
+        return []
+
+
+# === Scoring ===
+# Polarity per title, keyed by a hash of the text. Titles repeat heavily across
+# reruns and tickers, so most batches only score a handful of new strings.
+# The cache is an LRU capped at SCORE_CACHE_MAX titles.
+SCORE_CACHE_MAX = 50_000
+_analyzer = None
+_score_cache = OrderedDict()
+_score_lock = threading.Lock()
+
+def _title_key(title):
+    return hashlib.sha1(title.encode("utf-8")).hexdigest()
+
+def score_titles(titles):
+    """Polarity for every title, scoring only titles not seen before."""
+    global _analyzer
+    keys = [_title_key(t) for t in titles]
+    with _score_lock:
+        missing = {k: t for k, t in zip(keys, titles) if k not in _score_cache}
+        if missing:
+            if _analyzer is None:
+                from textblob.sentiments import PatternAnalyzer
+                _analyzer = PatternAnalyzer()
+            # Same analyzer TextBlob(title).sentiment uses, without building a
+            # TextBlob object per title
+            for k, t in missing.items():
+                _score_cache[k] = _analyzer.analyze(t).polarity
+        polarity = np.empty(len(keys))
+        for i, k in enumerate(keys):
+            polarity[i] = _score_cache[k]
+            _score_cache.move_to_end(k)
+        # Evict after reading, so a batch larger than the cap still gets its scores
+        while len(_score_cache) > SCORE_CACHE_MAX:
+            _score_cache.popitem(last=False)
+        return polarity
+
+def _reddit_score(polarity, karma):
+    """Karma-weighted polarity; same weighting as the original per-post loop."""
+    karma_total = int(karma.sum())
+    if karma_total <= 0:
+        return 0.0, karma_total
+    return float(np.sum(polarity * np.maximum(1, karma)) / karma_total), karma_total
+
+def _news_score(polarity):
+    return float(np.mean(polarity)) if len(polarity) else 0.0
+
+
+# === Batch service ===
+# {(ticker, api_key, max_posts, max_headlines): (expires_at, result)}. Expired
+# entries are pruned on insert and the oldest go once RESULT_CACHE_MAX is hit.
+RESULT_CACHE_MAX = 1024
+_result_cache = OrderedDict()
+_result_lock = threading.Lock()
+
+def _prune_results(now):
+    for key in [k for k, (expires, _) in _result_cache.items() if expires <= now]:
+        del _result_cache[key]
+    while len(_result_cache) > RESULT_CACHE_MAX:
+        _result_cache.popitem(last=False)
+
+@traced("sentiment")
+def get_sentiment_batch(tickers, api_key=None, max_posts=50, max_headlines=5,
+                        max_workers=8, ttl=SENTIMENT_CACHE_TTL):
+    """
+    Sentiment for many tickers at once.
+    Reddit and NewsAPI requests for all tickers run concurrently, every new title
+    is scored in a single batch, and per-ticker results are cached for ttl seconds.
+    Requests run on the shared pool from get_executor(); max_workers sizes it on
+    the first call only.
+    Returns {ticker: (reddit_sent, karma_total, news_sent)}.
+    """
+    now = time.time()
+    results = {}
+    pending = []
+    with _result_lock:
+        for ticker in dict.fromkeys(tickers):
+            key = (ticker, api_key, max_posts, max_headlines)
+            hit = _result_cache.get(key)
+            if hit and hit[0] > now:
+                results[ticker] = hit[1]
+            else:
+                pending.append(ticker)
+
+    sp = current_span()
+    sp.set(tickers=len(results) + len(pending), cache_hits=len(results))
+    if not pending:
+        return results
+
+    pool = get_executor(max_workers)
+    reddit_jobs = {t: pool.submit(fetch_reddit_posts, t, max_posts) for t in pending}
+    news_jobs = {t: pool.submit(fetch_news_articles, t, api_key, max_headlines) for t in pending}
+    posts = {t: job.result() for t, job in reddit_jobs.items()}
+    articles = {t: job.result() for t, job in news_jobs.items()}
+
+    titles = []
+    for t in pending:
+        titles.extend(p["title"] for p in posts[t])
+        titles.extend(a["title"] for a in articles[t])
+    polarity = score_titles(titles)
+    sp.set(titles=len(titles))
+
+    pos = 0
+    with _result_lock:
+        for t in pending:
+            n_posts, n_news = len(posts[t]), len(articles[t])
+            karma = np.array([p["karma"] for p in posts[t]], dtype=float)
+            reddit_sent, karma_total = _reddit_score(polarity[pos:pos + n_posts], karma)
+            pos += n_posts
+            news_sent = _news_score(polarity[pos:pos + n_news])
+            pos += n_news
+
+            results[t] = (reddit_sent, karma_total, news_sent)
+            key = (t, api_key, max_posts, max_headlines)
+            _result_cache.pop(key, None)  # re-insert at the end: newest last
+            _result_cache[key] = (now + ttl, results[t])
+        _prune_results(now)
+
+    return results
+
+
+# === Single-ticker helpers ===
+def get_reddit_sentiment(ticker, max_posts=50, reddit=None):
+    posts = fetch_reddit_posts(ticker, max_posts, reddit=reddit)
+    polarity = score_titles([p["title"] for p in posts])
+    karma = np.array([p["karma"] for p in posts], dtype=float)
+    return _reddit_score(polarity, karma)
+
+def get_news_sentiment(ticker, api_key, max_headlines=5):
+    articles = fetch_news_articles(ticker, api_key, max_headlines)
+    return _news_score(score_titles([a["title"] for a in articles]))
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from sentiment import fetch_reddit_posts, fetch_news_articles, score_titles
+
+STORE_FILE = Path("sentiment_store.csv")
+COLUMNS = ["id", "ticker", "source", "timestamp", "title", "karma", "score"]
+
+
+class SentimentStore:
+    """
+    Timestamped Reddit/news items per ticker, scored once on ingestion.
+
+    Items are deduplicated by (ticker, source, id), so a post that mentions two
+    tickers is stored under both. Each (ticker, source) keeps a watermark
+    (latest timestamp seen), so updates only fetch and score new items.
+    The daily series is karma-weighted and can be aligned to any price index.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = Path(path)
+        if self.path.exists():
+            self.items = pd.read_csv(self.path, parse_dates=["timestamp"])
+        else:
+            self.items = pd.DataFrame(columns=COLUMNS)
+        self._seen = set(zip(self.items["ticker"], self.items["source"], self.items["id"].astype(str)))
+
+    def watermark(self, ticker, source):
+        """Latest timestamp stored for (ticker, source), or None."""
+        mask = (self.items["ticker"] == ticker) & (self.items["source"] == source)
+        if not mask.any():
+            return None
+        return self.items.loc[mask, "timestamp"].max()
+
+    def ingest(self, ticker, source, records):
+        """
+        Add new records ({id, title, karma, timestamp}); returns the number added.
+        Only records not already stored are scored.
+        """
+        new = [r for r in records if (ticker, source, str(r["id"])) not in self._seen]
+        if not new:
+            return 0
+
+        df = pd.DataFrame(new)
+        df["id"] = df["id"].astype(str)
+        df = df.drop_duplicates("id")
+        df["ticker"] = ticker
+        df["source"] = source
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True).dt.tz_localize(None)
+        df["score"] = score_titles(df["title"].tolist())
+        if "karma" not in df:
+            df["karma"] = 0
+
+        self.items = pd.concat([self.items, df[COLUMNS]], ignore_index=True)
+        self._seen.update(zip(df["ticker"], df["source"], df["id"]))
+        return len(df)
+
+    def update(self, ticker, api_key=None, max_posts=100, max_headlines=100):
+        """Fetch items newer than the watermarks and ingest them."""
+        added = 0
+
+        since = self.watermark(ticker, "reddit")
+        posts = fetch_reddit_posts(ticker, max_posts, sort="new")
+        records = [
+            {"id": p["id"], "title": p["title"], "karma": p["karma"],
+             "timestamp": pd.to_datetime(p["created"], unit="s")}
+            for p in posts
+        ]
+        if since is not None:
+            records = [r for r in records if r["timestamp"] > since]
+        added += self.ingest(ticker, "reddit", records)
+
+        since = self.watermark(ticker, "news")
+        extra = {"from": since.isoformat()} if since is not None else {}
+        articles = fetch_news_articles(ticker, api_key, max_headlines, **extra)
+        records = [
+            {"id": a["id"], "title": a["title"], "karma": 0, "timestamp": a["published"]}
+            for a in articles if a.get("published")
+        ]
+        added += self.ingest(ticker, "news", records)
+
+        return added
+
+    def save(self):
+        self.items.to_csv(self.path, index=False)
+
+    def daily_sentiment(self, ticker, window=7, end=None):
+        """
+        Rolling karma-weighted daily sentiment for ticker.
+        Reddit posts weigh max(1, karma), headlines weigh 1.
+        Days without items count as empty, so the value is NaN once a whole
+        window has passed without news; end extends the series that way past
+        the last stored item.
+        """
+        df = self.items[self.items["ticker"] == ticker]
+        if df.empty:
+            return pd.Series(dtype=float)
+
+        weight = np.where(df["source"] == "reddit",
+                          np.maximum(1, df["karma"].astype(float)), 1.0)
+        day = pd.to_datetime(df["timestamp"]).dt.floor("D")
+        grouped = pd.DataFrame({
+            "num": df["score"].astype(float).to_numpy() * weight,
+            "den": weight,
+        }, index=day.to_numpy()).groupby(level=0).sum()
+
+        grouped = grouped.asfreq("D", fill_value=0.0)
+        if end is not None and pd.Timestamp(end).floor("D") > grouped.index[-1]:
+            days = pd.date_range(grouped.index[0], pd.Timestamp(end).floor("D"), freq="D")
+            grouped = grouped.reindex(days, fill_value=0.0)
+        rolled = grouped.rolling(window, min_periods=1).sum()
+        return (rolled["num"] / rolled["den"].replace(0.0, np.nan)).rename(ticker)
+
+    def aligned_sentiment(self, ticker, index, window=7, lag=1):
+        """
+        Daily sentiment mapped onto a price index, each bar taking its day's value.
+        lag shifts by whole days so a bar only sees sentiment from earlier days.
+        Bars more than a window past the last item get NaN rather than a stale value.
+        """
+        target = pd.DatetimeIndex(index)
+        if target.tz is not None:
+            target = target.tz_convert(None)
+        if len(target) == 0:
+            return pd.Series(np.nan, index=index, name=ticker)
+
+        daily = self.daily_sentiment(ticker, window, end=target.max() - pd.Timedelta(days=lag))
+        if daily.empty:
+            return pd.Series(np.nan, index=index, name=ticker)
+        if lag:
+            daily.index = daily.index + pd.Timedelta(days=lag)
+
+        # daily has one row per calendar day, so no forward fill is needed
+        aligned = daily.reindex(target.floor("D"))
+        aligned.index = index
+        return aligned
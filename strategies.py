@@ -1,81 +1,122 @@
+import numpy as np
 import pandas as pd
-import vectorbt as vbt
 
-def _to_series(x, index):
-    """Force any DataFrame/array into a boolean Series aligned to index."""
-    if isinstance(x, pd.DataFrame):
-        return x.any(axis=1).reindex(index, fill_value=False)
-    if isinstance(x, pd.Series):
-        return x.reindex(index, fill_value=False)
-    return pd.Series(x, index=index)
+def apply_sentiment_filter(entries, exits, sentiment, min_sentiment=0.0):
+    """
+    Gate entries on a sentiment series aligned to the price index.
+    Bars without sentiment count as neutral (0.0); exits are left untouched.
+    """
+    sentiment = sentiment.reindex(entries.index).fillna(0.0)
+    return entries & (sentiment >= min_sentiment), exits
 
-def build_signals(price, strat, params):
+def build_signals(price, strat, params, sentiment=None, min_sentiment=0.0):
     """
     Build entry/exit signals for a given strategy.
     Always returns (entries, exits) as boolean Series aligned to price.index.
+    If a sentiment series is given, entries below min_sentiment are dropped.
+    """
+    entries, exits = _strategy_signals(price, strat, params)
+    if sentiment is not None:
+        entries, exits = apply_sentiment_filter(entries, exits, sentiment, min_sentiment)
+    return entries, exits
+
+def signal_warmup(params):
+    """
+    Bars of history the indicators need before their values are final. All
+    strategies use finite rolling windows, so the sum of numeric params is a
+    safe upper bound (e.g. MACD slow_window + signal_window).
+    """
+    return int(sum(v for v in params.values() if isinstance(v, (int, float)))) + 1
+
+def build_signals_chunked(price, strat, params, chunk_size=1_000_000):
     """
+    build_signals over fixed-size chunks for series too large to process at once
+    (e.g. memory-mapped intraday history). Each chunk is prefixed with warm-up
+    bars, so the stitched signals match a single full-length call.
+    """
+    n = len(price)
+    if n <= chunk_size:
+        return build_signals(price, strat, params)
+
+    warmup = signal_warmup(params)
+    entries = np.zeros(n, dtype=bool)
+    exits = np.zeros(n, dtype=bool)
+    for lo in range(0, n, chunk_size):
+        hi = min(lo + chunk_size, n)
+        warm_lo = max(0, lo - warmup)
+        e, x = build_signals(price.iloc[warm_lo:hi], strat, params)
+        entries[lo:hi] = e.to_numpy()[lo - warm_lo:]
+        exits[lo:hi] = x.to_numpy()[lo - warm_lo:]
+    return pd.Series(entries, index=price.index), pd.Series(exits, index=price.index)
+
+def _strategy_signals(price, strat, params):
+    """Single-series signals: one column through the same code as build_signals_frame."""
     try:
-        if strat == "MA":
-            fast = vbt.MA.run(price, window=params['fast']).ma.iloc[:, 0]
-            slow = vbt.MA.run(price, window=params['slow']).ma.iloc[:, 0]
-            entries = _to_series(fast > slow, price.index)
-            exits   = _to_series(fast < slow, price.index)
-            return entries, exits
-
-        elif strat == "RSI":
-            rsi = vbt.RSI.run(price, window=params['window']).rsi.iloc[:, 0]
-            overbought = params.get("overbought", 70)
-            oversold   = params.get("oversold", 30)
-            entries = _to_series(rsi < oversold, price.index)
-            exits   = _to_series(rsi > overbought, price.index)
-            return entries, exits
-
-        elif strat == "MACD":
-            macd = vbt.MACD.run(
-                price,
-                fast_window=params['fast_window'],
-                slow_window=params['slow_window'],
-                signal_window=params['signal_window']
-            )
-            entries = _to_series(macd.macd > macd.signal, price.index)
-            exits   = _to_series(macd.macd < macd.signal, price.index)
-            return entries, exits
-
-        elif strat == "Bollinger":
-            bb = vbt.BBANDS.run(
-                 price,
-                 window=params['window'],
-                 std=params.get('std', 2)
-            )
-            entries = (price < bb.lower.iloc[:, 0]).astype(bool)
-            exits   = (price > bb.upper.iloc[:, 0]).astype(bool)
-            return entries, exits
-        
-
-        elif strat == "Breakout":
-            roll_max = price.rolling(params['window']).max()
-            roll_min = price.rolling(params['window']).min()
-            entries = _to_series(price > roll_max.shift(1), price.index)
-            exits   = _to_series(price < roll_min.shift(1), price.index)
-            return entries, exits
-
-        elif strat == "Momentum":
-            mom = price.pct_change(params['window'])
-            entries = _to_series(mom > 0, price.index)
-            exits   = _to_series(mom < 0, price.index)
-            return entries, exits
-
-        elif strat == "MeanReversion":
-            mean = price.rolling(params['window']).mean()
-            std  = price.rolling(params['window']).std()
-            z    = (price - mean) / std
-            entries = _to_series(z < -params['zscore'], price.index)
-            exits   = _to_series(z > params['zscore'], price.index)
-            return entries, exits
-
-        else:
-            return pd.Series(False, index=price.index), pd.Series(False, index=price.index)
+        entries, exits = _signal_frames(price.to_frame(), strat, params)
+        return entries.iloc[:, 0].astype(bool), exits.iloc[:, 0].astype(bool)
+    except Exception as e:
+        print(f"[Strategy ERROR] {strat}: {e}")
+        return pd.Series(False, index=price.index), pd.Series(False, index=price.index)
 
+def build_signals_frame(prices, strat, params):
+    """
+    Column-wise build_signals for a DataFrame of price paths (one column per path),
+    so many paths can be backtested in one vectorized Portfolio.
+    Returns (entries, exits) as boolean DataFrames shaped like prices; a strategy
+    that fails gives all-False frames, as build_signals does.
+    """
+    try:
+        return _signal_frames(prices, strat, params)
     except Exception as e:
         print(f"[Strategy ERROR] {strat}: {e}")
-        return pd.Series(False, index=price.index), pd.Series(False, index=price.index)
\ No newline at end of file
+        empty = pd.DataFrame(False, index=prices.index, columns=prices.columns)
+        return empty, empty.copy()
+
+def _signal_frames(prices, strat, params):
+    """Indicator logic for every strategy, on a DataFrame with one column per series."""
+    import vectorbt as vbt  # deferred: heavy import, only needed once signals are built
+
+    def frame(values):
+        return pd.DataFrame(np.asarray(values).reshape(prices.shape), index=prices.index, columns=prices.columns)
+
+    if strat == "MA":
+        fast = frame(vbt.MA.run(prices, window=params['fast']).ma)
+        slow = frame(vbt.MA.run(prices, window=params['slow']).ma)
+        return fast > slow, fast < slow
+
+    elif strat == "RSI":
+        rsi = frame(vbt.RSI.run(prices, window=params['window']).rsi)
+        return rsi < params.get("oversold", 30), rsi > params.get("overbought", 70)
+
+    elif strat == "MACD":
+        macd = vbt.MACD.run(
+            prices,
+            fast_window=params['fast_window'],
+            slow_window=params['slow_window'],
+            signal_window=params['signal_window']
+        )
+        line, signal = frame(macd.macd), frame(macd.signal)
+        return line > signal, line < signal
+
+    elif strat == "Bollinger":
+        # vectorbt calls the band width in standard deviations "alpha"
+        bb = vbt.BBANDS.run(prices, window=params['window'], alpha=params.get('std', 2))
+        return prices < frame(bb.lower), prices > frame(bb.upper)
+
+    elif strat == "Breakout":
+        roll_max = prices.rolling(params['window']).max()
+        roll_min = prices.rolling(params['window']).min()
+        return prices > roll_max.shift(1), prices < roll_min.shift(1)
+
+    elif strat == "Momentum":
+        mom = prices.pct_change(params['window'])
+        return mom > 0, mom < 0
+
+    elif strat == "MeanReversion":
+        mean = prices.rolling(params['window']).mean()
+        std = prices.rolling(params['window']).std()
+        z = (prices - mean) / std
+        return z < -params['zscore'], z > params['zscore']
+
+    empty = pd.DataFrame(False, index=prices.index, columns=prices.columns)
+    return empty, empty.copy()
@@ -1,20 +1,42 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
+import io
 import json
+import shutil
+import tempfile
 from pathlib import Path
 
-from core import walk_forward_optimize, run_backtest, stack_strategies, stack_by_correlation
-from config import strategy_params
+import warmup
+from core import (
+    walk_forward_optimize, run_backtest, stack_strategies, stack_by_correlation, stacked_signals
+)
+from config import (
+    strategy_params, PRICE_CACHE_TTL, MACRO_CACHE_TTL, OPTIMIZE_CACHE_TTL,
+    BACKTEST_CACHE_TTL, SENTIMENT_CACHE_TTL, WARMUP_ON_START
+)
 from data import get_price_data, get_macro_data
-from sentiment import get_reddit_sentiment, get_news_sentiment
+from sentiment import get_sentiment_batch
+from downsample import point_budget, downsample_series, slice_window
+from tracing import Tracer, set_tracer, span
+from batch_runner import load_results
 
 # --- Setup ---
 st.set_page_config(page_title="Multi-Ticker Strategy Lab", layout="wide")
 st.title("📊 Multi-Ticker Strategy Lab")
 
 HISTORY_FILE = Path("history.json")
+# Per-session (ticker, dates, strategies) results kept for reruns; oldest go first
+SESSION_RESULTS_MAX = 32
+
+# Compile numba kernels once per server process, off the first "Run" click
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    warmup.start_background_warmup()
+    return True
+
+if WARMUP_ON_START:
+    start_warmup()
 
 def load_history():
     if HISTORY_FILE.exists():
@@ -26,28 +48,138 @@ def save_history(history):
     with open(HISTORY_FILE, "w") as f:
         json.dump(history, f, indent=2)
 
+# --- Cached stages ---
+# Every widget change reruns this script, so each expensive stage is cached on
+# explicit keys (ticker, dates, strategy, params). Large inputs are passed as
+# underscore-prefixed args, which Streamlit leaves out of the hash.
+
+def _params_key(params):
+    return tuple(sorted(params.items()))
+
+def _grid_key(strat):
+    return tuple((k, tuple(v)) for k, v in strategy_params[strat].items())
+
+@st.cache_data(ttl=PRICE_CACHE_TTL, show_spinner=False)
+def cached_price_data(ticker, start, end):
+    return get_price_data(ticker, start=start, end=end)
+
+@st.cache_data(ttl=MACRO_CACHE_TTL, show_spinner=False)
+def cached_macro_data(start, end, selection):
+    return get_macro_data(start=start, end=end, selection=list(selection))
+
+@st.cache_data(ttl=OPTIMIZE_CACHE_TTL, show_spinner=False)
+def cached_optimize(ticker, start, end, strat, grid_key, _price):
+    return walk_forward_optimize(_price, strat)
+
+# Portfolios are not cheap to pickle, so they live in the resource cache and are
+# shared read-only between reruns.
+@st.cache_resource(ttl=BACKTEST_CACHE_TTL, max_entries=256, show_spinner=False)
+def cached_backtest(ticker, start, end, strat, params_key, _price):
+    return run_backtest(_price, strat, dict(params_key))
+
+@st.cache_resource(ttl=BACKTEST_CACHE_TTL, max_entries=256, show_spinner=False)
+def cached_or_stack(ticker, start, end, strats_key, _price):
+    return stack_strategies(_price, {strat: dict(p) for strat, p in strats_key})
+
+@st.cache_resource(ttl=BACKTEST_CACHE_TTL, max_entries=256, show_spinner=False)
+def cached_corr_stack(ticker, start, end, strats_key, corr_threshold, corr_metric, _price):
+    return stack_by_correlation(
+        _price, {strat: dict(p) for strat, p in strats_key},
+        lookback=252, corr_threshold=corr_threshold, metric=corr_metric
+    )
+
+@st.cache_data(ttl=SENTIMENT_CACHE_TTL, show_spinner=False)
+def cached_sentiment_batch(tickers, api_key):
+    return get_sentiment_batch(list(tickers), api_key=api_key)
+
+@st.cache_data(ttl=BACKTEST_CACHE_TTL, show_spinner=False)
+def cached_robustness(ticker, start, end, chosen_key, n_paths, _price, _pf):
+    from robustness import bootstrap_backtest, trade_shuffle
+    chosen = {strat: dict(p) for strat, p in chosen_key}
+    return bootstrap_backtest(_price, chosen, n_paths=n_paths), trade_shuffle(_pf, n_paths=n_paths)
+
+def stage(name, fn, *args, **tags):
+    """
+    Call a cached stage inside a timing span. A cache miss runs the traced
+    pipeline function, which shows up as a child span; no child means a hit.
+    """
+    with span(name, **tags) as sp:
+        result = fn(*args)
+        sp.set(cache_hit=not sp.children)
+    return result
+
+def optimize_ticker(ticker, start, end, strategies, history):
+    """
+    Fetch + walk-forward optimize one ticker, reusing results kept in session state.
+    Returns (price, best_strats, strat_scores); history is only touched on fresh results.
+    Session entries last until the next Run click for the same inputs (see
+    drop_session_results), so the cache TTLs decide how fresh a rerun is.
+    """
+    results = st.session_state.setdefault("ticker_results", {})
+    key = (ticker, start, end, tuple(strategies))
+    if key in results:
+        with span("session_reuse", strategies=len(strategies)):
+            results[key] = results.pop(key)  # most recently used goes last
+            return results[key]
+
+    price = stage("fetch", cached_price_data, ticker, start, end)
+    best_strats = {}
+    strat_scores = {}
+    if not price.empty:
+        for strat in strategies:
+            best_params, best_score = stage("optimize", cached_optimize, ticker, start, end, strat,
+                                            _grid_key(strat), price, strategy=strat)
+            if best_params:
+                best_strats[strat] = best_params
+                strat_scores[strat] = best_score
+                history.setdefault(ticker, {})[strat] = round(best_score, 4)
+
+    # Empty fetches are not pinned in the session so the next rerun can retry
+    if not price.empty:
+        results[key] = (price, best_strats, strat_scores)
+        while len(results) > SESSION_RESULTS_MAX:
+            results.pop(next(iter(results)))
+    return price, best_strats, strat_scores
+
+def drop_session_results(tickers, start, end, strategies):
+    """Forget session results for these inputs so the next run goes through the TTL caches."""
+    results = st.session_state.get("ticker_results", {})
+    for ticker in tickers:
+        results.pop((ticker, start, end, tuple(strategies)), None)
+
+@st.cache_data(ttl=PRICE_CACHE_TTL, show_spinner=False)
+def cached_sweep(out_dir, summary_mtime):
+    # summary.csv is rewritten at the end of every sweep, so its mtime is the version key
+    return pd.read_csv(Path(out_dir) / "summary.csv"), load_results(out_dir)
+
 def recommend_strategy(ticker, history):
     strat_scores = history.get(ticker, {})
     if not strat_scores:
         return None
     return max(strat_scores.items(), key=lambda x: x[1])[0]
 
-def plot_comparison(pf_dict):
+def plot_comparison(pf_dict, n_points=None, window=None):
+    import plotly.graph_objects as go
     fig = go.Figure()
     for ticker, pf in pf_dict.items():
-        cum_returns = pf.cumulative_returns()
+        cum_returns = slice_window(pf.cumulative_returns(), window)
+        if n_points:
+            cum_returns = downsample_series(cum_returns, n_points)
         fig.add_trace(go.Scatter(x=cum_returns.index, y=cum_returns.values,
                                  mode='lines', name=ticker))
     fig.update_layout(title="📊 Cumulative Return Comparison", height=500, legend=dict(orientation="h"))
     return fig
 
-def add_macro_overlays(fig, macro_dict, price_index, secondary_y=True):
+def add_macro_overlays(fig, macro_dict, price_index, secondary_y=True, n_points=None):
+    import plotly.graph_objects as go
     secondary_y = bool(secondary_y)  # Ensure it's a plain bool
 
     for name, series in macro_dict.items():
         if series is None or series.empty:
             continue
-        series = series.reindex(price_index).fillna(method='ffill')
+        series = series.reindex(price_index).ffill()
+        if n_points:
+            series = downsample_series(series, n_points)
         fig.add_trace(go.Scatter(
             x=series.index,
             y=series.values,
@@ -85,10 +217,34 @@ corr_threshold = st.slider("Correlation threshold (lower = stricter)", min_value
 corr_metric = st.selectbox("Correlation metric", ["returns", "signals"], index=0)
 
 show_sentiment = st.checkbox("Overlay sentiment scores", value=True)
+export_bundle = st.checkbox("📦 Build run bundle (Parquet: trades, equity, signals, params, stats)", value=False)
+run_robustness = st.checkbox("🎲 Monte Carlo robustness of the chosen strategy/stack", value=False)
+n_mc_paths = st.select_slider("Resampled paths", options=[500, 1000, 2000, 5000], value=1000,
+                              disabled=not run_robustness)
 api_key = st.text_input("NewsAPI Key", type="password")
 
 macro_selection = st.multiselect("Macro overlays", ["VIX", "US10Y", "DXY", "SPY"], default=["VIX", "US10Y", "SPY"])
 
+trace_enabled = st.sidebar.checkbox("⏱️ Record stage timings", value=False)
+sweep_dir = st.sidebar.text_input("📂 Precomputed sweep directory", value="")
+
+# --- Chart Resolution ---
+# Long series are downsampled (LTTB) to a budget derived from the chart width.
+# Streamlit does not report a chart's rendered width back to the script, so
+# the width is a sidebar setting rather than measured from the layout; the
+# default fits a full-width chart in the wide layout on a 1080p screen.
+# Narrowing the chart window re-samples just that span, so zooming in here
+# recovers full resolution.
+st.sidebar.header("📐 Chart Resolution")
+chart_width = st.sidebar.number_input("Chart width (px)", min_value=300, max_value=4000, value=1400, step=100,
+                                      help="Rendered width of the charts; the point budget is about 2 points per pixel. "
+                                           "Raise it on wide or high-DPI screens.")
+n_points = point_budget(chart_width)
+chart_window = None
+if start_date < end_date:
+    chart_window = st.sidebar.slider("Chart window", min_value=start_date, max_value=end_date,
+                                     value=(start_date, end_date))
+
 # --- Parameter Tuning ---
 st.sidebar.header("🔧 Parameter Tuning (manual override)")
 custom_params = {}
@@ -98,39 +254,80 @@ for strat in selected_strategies:
     for param, values in strategy_params[strat].items():
         custom_params[strat][param] = st.sidebar.selectbox(f"{strat} - {param}", values)
 
+# --- Precomputed Sweep (from batch_runner.py) ---
+sweep_summary = Path(sweep_dir) / "summary.csv" if sweep_dir else None
+if sweep_summary is not None:
+    if sweep_summary.exists():
+        summary_df, sweep_results = cached_sweep(sweep_dir, sweep_summary.stat().st_mtime)
+        st.subheader(f"🗂️ Precomputed Sweep ({len(summary_df)} tickers)")
+        st.dataframe(summary_df)
+        picked = st.selectbox("Sweep details for", list(sweep_results.keys()))
+        if picked:
+            st.json(sweep_results[picked])
+    else:
+        st.warning(f"No summary.csv in {sweep_dir}")
+
 # --- Run Optimization ---
+# The button arms the analysis for the current tickers, dates and strategies.
+# Later reruns from downstream knobs (threshold, metric, sentiment toggle,
+# chart settings) redraw from cached stages; changing any of the armed inputs
+# needs another click before anything is fetched or optimized.
+run_inputs = (tuple(t.strip() for t in tickers if t.strip()), start_date, end_date, tuple(selected_strategies))
 if st.button("Run Strategy Analysis"):
+    st.session_state["armed_inputs"] = run_inputs
+    # An explicit click refreshes: cached stages past their TTL (e.g. today's
+    # new bars) are fetched again instead of replaying the session copy
+    drop_session_results(*run_inputs)
+analysis_active = st.session_state.get("armed_inputs") == run_inputs
+if not analysis_active and "armed_inputs" in st.session_state:
+    st.info("Tickers, dates or strategies changed: press Run Strategy Analysis to recompute.")
+
+if analysis_active:
+    import plotly.graph_objects as go  # deferred until there is something to chart
+    tracer = Tracer(enabled=trace_enabled)
+    bundle = None
+    if export_bundle:
+        from export import RunExporter, ticker_frames
+        bundle_dir = Path(tempfile.mkdtemp(prefix="run_bundle_"))
+        bundle = RunExporter(bundle_dir / "bundle")
+    set_tracer(tracer)
     history = load_history()
     pf_dict = {}
+    price_dict = {}
     comparison_rows = []
 
+    # Sentiment for the whole ticker list in one concurrent, batch-scored call
+    sentiment_by_ticker = {}
+    if show_sentiment:
+        run_tickers = tuple(t.strip() for t in tickers if t.strip())
+        sentiment_by_ticker = stage("sentiment", cached_sentiment_batch, run_tickers, api_key)
+
     for raw_ticker in tickers:
         ticker = raw_ticker.strip()
         if not ticker:
             continue
 
         st.subheader(f"📈 {ticker}")
-        price = get_price_data(ticker, start=start_date, end=end_date)
+        tracer.tags = {"ticker": ticker}
+        price, best_strats, strat_scores = optimize_ticker(
+            ticker, start_date, end_date, selected_strategies, history
+        )
 
         # 🔍 Debug: Show price data
         st.write(f"Fetched {len(price)} rows for {ticker}")
         if not price.empty:
-            st.line_chart(price)
+            st.line_chart(downsample_series(slice_window(price, chart_window), n_points))
         else:
             st.warning(f"No price data available for {ticker}")
             continue
 
-        # Walk-forward optimization for each selected strategy
-        best_strats = {}
-        strat_scores = {}
+        price_dict[ticker] = price
 
+        # Walk-forward optimization results for each selected strategy
         for strat in selected_strategies:
-            best_params, best_score = walk_forward_optimize(price, strat)
-            if best_params:
-                best_strats[strat] = best_params
-                strat_scores[strat] = best_score
-                st.markdown(f"**{strat}** → Best Params: `{best_params}`, Avg OOS Return: `{round(best_score*100, 2)}%`")
-                history.setdefault(ticker, {})[strat] = round(best_score, 4)
+            if strat in best_strats:
+                best_score = strat_scores[strat]
+                st.markdown(f"**{strat}** → Best Params: `{best_strats[strat]}`, Avg OOS Return: `{round(best_score*100, 2)}%`")
             else:
                 st.warning(f"{strat} failed for {ticker}")
 
@@ -143,20 +340,23 @@ if st.button("Run Strategy Analysis"):
         # Backtest
         pf = None
         chosen_strats = []
+        strats_key = tuple((strat, _params_key(p)) for strat, p in best_strats.items())
         if stack_mode == "None":
             if strat_scores:
                 top_strat = max(strat_scores.items(), key=lambda x: x[1])
-                pf = run_backtest(price, top_strat[0], best_strats[top_strat[0]])
+                pf = stage("backtest", cached_backtest, ticker, start_date, end_date, top_strat[0],
+                           _params_key(best_strats[top_strat[0]]), price)
                 chosen_strats = [top_strat[0]]
                 st.markdown(f"✅ **Backtest: {top_strat[0]}**")
         elif stack_mode == "OR stack":
             if best_strats:
-                pf = stack_strategies(price, best_strats)
+                pf = stage("stack", cached_or_stack, ticker, start_date, end_date, strats_key, price)
                 chosen_strats = list(best_strats.keys())
                 st.markdown("✅ **Backtest: OR-stacked strategies**")
         else:
             if best_strats:
-                pf, chosen_strats = stack_by_correlation(price, best_strats, lookback=252, corr_threshold=corr_threshold, metric=corr_metric)
+                pf, chosen_strats = stage("stack", cached_corr_stack, ticker, start_date, end_date,
+                                          strats_key, corr_threshold, corr_metric, price)
                 st.markdown(f"✅ **Backtest: Correlation-based stack** (chosen: {', '.join(chosen_strats)})")
 
         if pf is None:
@@ -166,36 +366,41 @@ if st.button("Run Strategy Analysis"):
         pf_dict[ticker] = pf
 
         # Sentiment overlay
-        reddit_sent, karma = get_reddit_sentiment(ticker)
-        news_sent = get_news_sentiment(ticker, api_key)
-        sentiment_combined = round((reddit_sent + news_sent) / 2, 3)
+        if show_sentiment:
+            reddit_sent, karma, news_sent = sentiment_by_ticker.get(ticker, (0.0, 0, 0.0))
+            sentiment_combined = round((reddit_sent + news_sent) / 2, 3)
 
-        # Chart
+        # Chart (line is downsampled, buy/sell markers stay exact)
+        chart_price = slice_window(price, chart_window)
+        line_price = downsample_series(chart_price, n_points)
         fig = go.Figure()
-        fig.add_trace(go.Scatter(x=price.index, y=price.values, mode='lines', name=f'{ticker} Price'))
+        fig.add_trace(go.Scatter(x=line_price.index, y=line_price.values, mode='lines', name=f'{ticker} Price'))
 
         from strategies import build_signals
         entries, exits = build_signals(price, chosen_strats[0], best_strats[chosen_strats[0]])
-        fig.add_trace(go.Scatter(x=price.index[entries], y=price[entries], mode='markers',
+        entries = entries.reindex(chart_price.index, fill_value=False)
+        exits = exits.reindex(chart_price.index, fill_value=False)
+        fig.add_trace(go.Scatter(x=chart_price.index[entries], y=chart_price[entries], mode='markers',
                                  marker=dict(color='green', size=6), name='Buy'))
-        fig.add_trace(go.Scatter(x=price.index[exits], y=price[exits], mode='markers',
+        fig.add_trace(go.Scatter(x=chart_price.index[exits], y=chart_price[exits], mode='markers',
                                  marker=dict(color='red', size=6), name='Sell'))
 
         # Macro overlays
-        macro_dict = get_macro_data(start=start_date, end=end_date, selection=macro_selection)
+        macro_dict = stage("macro", cached_macro_data, start_date, end_date, tuple(macro_selection))
 
         # 🔍 Debug: Show macro data points
         for name, series in macro_dict.items():
             st.write(f"Macro overlay '{name}': {len(series)} points")
 
-        fig = add_macro_overlays(fig, macro_dict,price.index)
+        fig = add_macro_overlays(fig, macro_dict, chart_price.index, n_points=n_points)
 
         if show_sentiment:
             fig.add_annotation(text=f"🗣️ Sentiment: {sentiment_combined} (Reddit: {round(reddit_sent,3)}, News: {round(news_sent,3)}, Karma: {karma})",
                                xref="paper", yref="paper", x=0.01, y=1.05, showarrow=False, font=dict(size=12))
 
         fig.update_layout(title=f"{ticker} Strategy Chart", height=540, legend=dict(orientation="h"))
-        st.plotly_chart(fig, use_container_width=True)
+        with span("chart", traces=len(fig.data), line_points=len(line_price)):
+            st.plotly_chart(fig, use_container_width=True)
         # --- Stats + Export ---
         if pf is not None and pf.trades.count().sum() > 0:
             stats = pf.stats()
@@ -217,18 +422,73 @@ if st.button("Run Strategy Analysis"):
                 st.warning("Stats are empty — skipping summary row.")
         else:
             st.warning("No valid portfolio — skipping summary row.")
+        # --- Robustness (block bootstrap + trade-order shuffle) ---
+        if run_robustness:
+            chosen_key = tuple((strat, _params_key(best_strats[strat])) for strat in chosen_strats)
+            boot_ci, shuffle_ci = stage("robustness", cached_robustness, ticker, start_date, end_date,
+                                        chosen_key, n_mc_paths, price, pf, paths=n_mc_paths)
+            st.markdown(f"🎲 **Robustness** over {n_mc_paths} block-bootstrapped price paths")
+            st.dataframe(boot_ci)
+            if not shuffle_ci.empty:
+                st.markdown("🔀 **Trade-order shuffle** (drawdown path dependence)")
+                st.dataframe(shuffle_ci)
+
         csv = pf.trades.records_readable.to_csv(index=False)
         st.download_button("📥 Download Trades CSV", csv, file_name=f"{ticker}_trades.csv", mime="text/csv")
 
+        # Stream this ticker into the run bundle as soon as it is done
+        if bundle is not None:
+            with span("export"):
+                stack_entries, stack_exits = stacked_signals(price, {s: best_strats[s] for s in chosen_strats})
+                bundle.write(ticker_frames(ticker, pf, stack_entries, stack_exits,
+                                           best_strats, strat_scores, chosen_strats))
+
 
       
 
+    # Spans from here on cover the whole run, so they belong under "(shared)"
+    tracer.tags = {}
+
+    # Run bundle download
+    if bundle is not None:
+        bundle.close()
+        archive = shutil.make_archive(str(bundle_dir / "run_bundle"), "zip", bundle_dir / "bundle")
+        with open(archive, "rb") as f:
+            bundle_bytes = io.BytesIO(f.read())
+        shutil.rmtree(bundle_dir, ignore_errors=True)
+        st.download_button("📦 Download run bundle (Parquet, zip)", bundle_bytes,
+                           file_name="run_bundle.zip", mime="application/zip")
+
     # Comparison chart
     if pf_dict:
         st.subheader("📊 Side-by-Side Cumulative Return Comparison")
-        st.plotly_chart(plot_comparison(pf_dict), use_container_width=True)
+        st.plotly_chart(plot_comparison(pf_dict, n_points=n_points, window=chart_window), use_container_width=True)
+
+    # Diversified basket across the run's tickers (same threshold as the strategy stack)
+    if len(price_dict) >= 3:
+        from screener import screen
+        with span("screen", tickers=len(price_dict)):
+            basket, corr = screen(price_dict, lookback=252, corr_threshold=corr_threshold)
+        st.subheader("🧺 Diversified Basket")
+        st.markdown(f"Chosen (|corr| with basket < {corr_threshold}): **{', '.join(basket)}**")
+        st.dataframe(corr.round(2))
 
     # Summary table
     if comparison_rows:
         st.subheader("🧾 Summary: Strategy Choices & Metrics")
         st.dataframe(pd.DataFrame(comparison_rows))
+
+    # Stage timings
+    if trace_enabled and tracer.roots:
+        st.subheader("⏱️ Stage Timings")
+        shared = tracer.roots_for(ticker=None)
+        for label, roots in [("(shared)", shared)] + [(t, tracer.roots_for(ticker=t)) for t in dict.fromkeys(
+            t.strip() for t in tickers if t.strip())]:
+            if roots:
+                with st.expander(f"{label} — {sum(r.duration for r in roots) * 1000:.0f} ms"):
+                    st.dataframe(pd.DataFrame(tracer.rows(roots)))
+        col_json, col_chrome = st.columns(2)
+        col_json.download_button("📥 Timings JSON", tracer.to_json(),
+                                 file_name="timings.json", mime="application/json")
+        col_chrome.download_button("📥 Chrome trace", tracer.to_chrome_trace(),
+                                   file_name="trace.json", mime="application/json")
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-from scipy.signal import argrelextrema
 from typing import List, Tuple, Dict
 import warnings
 warnings.filterwarnings('ignore')
@@ -14,17 +13,32 @@ class SupportResistanceFinder:
     4. Fibonacci retracements
     """
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, copy: bool = True):
         """
         Initialize with OHLCV data
         df should have columns: ['Open', 'High', 'Low', 'Close', 'Volume']
         and datetime index
+
+        Args:
+            copy: Set False to work on df directly (e.g. memory-mapped views);
+                  the finder never modifies its frame
         """
-        self.df = df.copy()
+        self.df = df.copy() if copy else df
         self.support_levels = []
         self.resistance_levels = []
         self.fib_levels = {}
         
+    @classmethod
+    def from_store(cls, store, ticker: str, start: int = None, stop: int = None):
+        """
+        Build a finder over a PriceStore ticker without copying its columns
+        
+        Args:
+            store: price_store.PriceStore holding the ticker
+            start, stop: Optional bar positions to restrict the window
+        """
+        return cls(store.frame(ticker, start, stop), copy=False)
+    
     def find_swing_points(self, order: int = 5) -> Tuple[List[float], List[float]]:
         """
         Find swing highs and lows using local extrema
@@ -35,6 +49,8 @@ class SupportResistanceFinder:
         Returns:
             Tuple of (support_levels, resistance_levels)
         """
+        from scipy.signal import argrelextrema  # deferred: scipy is slow to import
+
         # Find local minima (support)
         local_min_idx = argrelextrema(self.df['Low'].values, np.less, order=order)[0]
         support = self.df['Low'].iloc[local_min_idx].values
@@ -0,0 +1,223 @@
+"""
+Lightweight nested timing spans for the analysis pipeline.
+
+    with span("optimize", strategy="MA") as sp:
+        ...
+        sp.count("windows")
+
+    @traced("backtest")
+    def run_backtest(...): ...
+
+Each thread has its own active Tracer (Streamlit runs every session in its own
+thread), so one user's tracing does not leak into another's. When the active
+tracer is disabled, span() returns a shared no-op object and traced() calls
+straight through, so instrumented code pays one attribute check.
+"""
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+
+class Span:
+    __slots__ = ("name", "args", "start", "end", "children", "tid")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = None
+        self.end = None
+        self.children = []
+        self.tid = threading.get_ident()
+
+    @property
+    def duration(self):
+        if self.start is None:
+            return 0.0
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def count(self, key, n=1):
+        self.args[key] = self.args.get(key, 0) + n
+
+    def set(self, **values):
+        self.args.update(values)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 3),
+            "args": self.args,
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is disabled; every method is a no-op."""
+    __slots__ = ()
+    children = ()
+    args = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, key, n=1):
+        pass
+
+    def set(self, **values):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "span")
+
+    def __init__(self, tracer, span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self):
+        self.tracer._push(self.span)
+        self.span.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, *exc):
+        self.span.end = time.perf_counter()
+        self.tracer._pop()
+        return False
+
+
+class Tracer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.roots = []
+        self.tags = {}
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, span):
+        stack = self._stack()
+        if stack:
+            stack[-1].children.append(span)
+        else:
+            span.args = {**self.tags, **span.args}
+            with self._lock:
+                self.roots.append(span)
+        stack.append(span)
+
+    def _pop(self):
+        self._stack().pop()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return _SpanContext(self, Span(name, args))
+
+    def current(self):
+        stack = self._stack() if self.enabled else None
+        return stack[-1] if stack else NULL_SPAN
+
+    def reset(self):
+        with self._lock:
+            self.roots = []
+        self.tags = {}
+        self.origin = time.perf_counter()
+
+    # === Export ===
+    def to_json(self, roots=None, indent=2):
+        return json.dumps([s.to_dict() for s in (roots or self.roots)], indent=indent, default=str)
+
+    def to_chrome_trace(self, roots=None):
+        """Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = []
+
+        def walk(span):
+            events.append({
+                "name": span.name,
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": pid,
+                "tid": span.tid,
+                "args": span.args,
+            })
+            for child in span.children:
+                walk(child)
+
+        for root in (roots or self.roots):
+            walk(root)
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+
+    def rows(self, roots=None):
+        """Flattened (depth-indented) rows for a table view."""
+        out = []
+
+        def walk(span, depth):
+            child_time = sum(c.duration for c in span.children)
+            out.append({
+                "stage": "  " * depth + span.name,
+                "ms": round(span.duration * 1000, 2),
+                "self_ms": round((span.duration - child_time) * 1000, 2),
+                **{k: v for k, v in span.args.items()},
+            })
+            for child in span.children:
+                walk(child, depth + 1)
+
+        for root in (roots or self.roots):
+            walk(root, 0)
+        return out
+
+    def roots_for(self, **tags):
+        return [s for s in self.roots if all(s.args.get(k) == v for k, v in tags.items())]
+
+
+# === Active tracer (per thread) ===
+_default = Tracer(enabled=os.getenv("STRATLAB_TRACE", "0") == "1")
+_local = threading.local()
+
+
+def get_tracer():
+    return getattr(_local, "tracer", None) or _default
+
+
+def set_tracer(tracer):
+    _local.tracer = tracer
+
+
+def span(name, **args):
+    return get_tracer().span(name, **args)
+
+
+def current_span():
+    return get_tracer().current()
+
+
+def count(key, n=1):
+    current_span().count(key, n)
+
+
+def traced(name):
+    """Decorator: run the function inside span(name) when tracing is enabled."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,120 @@
+"""
+JIT warm-up for the backtest path.
+
+vectorbt's numba kernels compile on first use, which lands on the first
+"Run" click. warm_up() pushes a tiny synthetic series through every strategy
+and the portfolio/stat calls the app makes, so compilation happens at server
+start instead. vectorbt compiles with cache=True, so with NUMBA_CACHE_DIR set
+the machine code is reused across restarts.
+
+Usage:
+    python warmup.py            # warm the on-disk cache
+    python warmup.py --measure  # time-to-first-result, cold vs warmed
+"""
+import os
+import sys
+import time
+import threading
+from pathlib import Path
+
+# Must be set before numba is first imported anywhere in the process
+os.environ.setdefault("NUMBA_CACHE_DIR", str(Path.home() / ".cache" / "stratlab-numba"))
+
+_state = {"status": "idle", "elapsed": None, "error": None}
+_lock = threading.Lock()
+
+
+def synthetic_price(n=300, seed=0):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.01, n)
+    # Calendar days: vectorbt needs a freq it can turn into a Timedelta for
+    # stats and daily returns, which BusinessDay is not
+    index = pd.date_range("2000-01-03", periods=n, freq="D")
+    return pd.Series(100 * np.exp(np.cumsum(returns)), index=index)
+
+
+def warm_up():
+    """Compile the numba kernels used by the app; returns elapsed seconds."""
+    from config import strategy_params
+    from core import walk_forward_optimize, stack_by_correlation
+
+    t0 = time.perf_counter()
+    price = synthetic_price()
+    best = {}
+    for strat in strategy_params:
+        best[strat], _ = walk_forward_optimize(price, strat, train_window=100, test_window=50)
+    pf, _ = stack_by_correlation(price, best, lookback=100)
+    pf.stats()
+    pf.cumulative_returns()
+    pf.trades.records_readable
+    return time.perf_counter() - t0
+
+
+def _run():
+    try:
+        elapsed = warm_up()
+        with _lock:
+            _state.update(status="done", elapsed=elapsed)
+    except Exception as e:
+        print(f"[Warmup ERROR] {e}")
+        with _lock:
+            _state.update(status="failed", error=str(e))
+
+
+def start_background_warmup():
+    """Start warm_up() on a daemon thread (once per process)."""
+    with _lock:
+        if _state["status"] != "idle":
+            return
+        _state["status"] = "running"
+    threading.Thread(target=_run, name="jit-warmup", daemon=True).start()
+
+
+def warmup_status():
+    with _lock:
+        return dict(_state)
+
+
+# === Time-to-first-result measurement ===
+_FIRST_RESULT = """
+import time
+t0 = time.perf_counter()
+import warmup
+from core import walk_forward_optimize, stack_by_correlation
+from config import strategy_params
+price = warmup.synthetic_price(2520, seed=1)
+best = {s: walk_forward_optimize(price, s)[0] for s in ("MA", "RSI", "MACD")}
+pf, _ = stack_by_correlation(price, best)
+pf.stats()
+print(time.perf_counter() - t0)
+"""
+
+
+def _run_fresh(args, cache_dir):
+    import subprocess
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    out = subprocess.run([sys.executable, *args], env=env, capture_output=True,
+                         text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return out.stdout
+
+
+def measure():
+    """Print time-to-first-result in a fresh process, before and after warm-up."""
+    import tempfile
+    with tempfile.TemporaryDirectory() as cold_dir, tempfile.TemporaryDirectory() as warm_dir:
+        cold = float(_run_fresh(["-c", _FIRST_RESULT], cold_dir).split()[-1])
+        _run_fresh([__file__], warm_dir)
+        warm = float(_run_fresh(["-c", _FIRST_RESULT], warm_dir).split()[-1])
+
+    print(f"time-to-first-result  cold: {cold:.2f}s  after warm-up: {warm:.2f}s")
+
+
+if __name__ == "__main__":
+    if "--measure" in sys.argv:
+        measure()
+    else:
+        print(f"[Warmup] compiled in {warm_up():.2f}s "
+              f"(cache: {os.environ['NUMBA_CACHE_DIR']})")